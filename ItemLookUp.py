@@ -1,6 +1,20 @@
+import math
+import os
+import threading
+import time
+from contextlib import closing
+
 import streamlit as st
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from drive_crawl import CrawlStats, crawl_tree, execute_with_backoff
+from drive_index import DriveIndex, format_age
+from id_matcher import IdMatcher, parse_id_list
+from inventory_store import InventoryStore
+from metrics import METRICS
+from query_cache import QueryCache, clean_query
+from thumb_cache import ThumbnailCache
 
 # --- 1. LAYOUT CONFIG ---
 st.set_page_config(layout="wide", page_title="Drive Search")
@@ -8,62 +22,233 @@ st.set_page_config(layout="wide", page_title="Drive Search")
 # --- AUTH & SETUP ---
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
+# How old the local index may get before a search triggers an incremental sync
+INDEX_SYNC_INTERVAL = 60
+
+# Default number of matches after which a search stops early
+DEFAULT_RESULT_CAP = 100
+
+# Shared inventory store (see inventory_store.py); quantities are shown under results when it exists
+INVENTORY_DB = os.environ.get("INVENTORY_DB", "inventory.db")
+
+# Images shown per ID in bulk lookup (one grid row)
+BULK_IMAGES_PER_ID = 5
+
 if 'search_results' not in st.session_state:
     st.session_state.search_results = []
 if 'last_query' not in st.session_state:
     st.session_state.last_query = ""
+if 'page' not in st.session_state:
+    st.session_state.page = 0
+if 'bulk_results' not in st.session_state:
+    st.session_state.bulk_results = None
+
+METRICS.start_exporting()
 
-def get_drive_service():
+def get_drive_credentials():
     try:
         if "gcp_service_account" not in st.secrets:
             st.error("Secrets not found!")
             st.stop()
         key_dict = st.secrets["gcp_service_account"]
-        creds = service_account.Credentials.from_service_account_info(
+        return service_account.Credentials.from_service_account_info(
             key_dict, scopes=SCOPES
         )
-        return build('drive', 'v3', credentials=creds)
     except Exception as e:
         st.error(f"Auth Error: {str(e)}")
         st.stop()
 
-def search_recursive(service, root_folder_id, query_text):
-    """Crawls through folders."""
-    found_files = []
-    folder_stack = [root_folder_id]
+def get_service_factory():
+    """Drive clients aren't thread-safe, so every crawl worker builds its own."""
+    creds = get_drive_credentials()
+    return lambda: build('drive', 'v3', credentials=creds)
+
+def show_crawl_errors(stats):
+    for folder_id, e in stats.errors:
+        st.sidebar.warning(f"Error reading folder {folder_id}: {e}")
+
+def search_recursive(service_factory, root_folder_id, query_text, stats):
+    """Crawls through folders, yielding each match as soon as its folder is listed.
+
+    stats (a CrawlStats) is filled in as the crawl goes, so the caller can see which folders failed.
+    """
+    needle = query_text.lower()
+    found = 0
     
     # Status indicator in sidebar to keep main area clean
     status_text = st.sidebar.empty()
     
-    while folder_stack:
-        current_id = folder_stack.pop()
+    try:
+        with closing(crawl_tree(service_factory, root_folder_id, name_contains=query_text, stats=stats)) as pages:
+            for folder_id, items in pages:
+                for item in items:
+                    if needle in item['name'].lower() and "image/" in item.get('mimeType', ''):
+                        found += 1
+                        yield item
+                
+                status_text.text(f"Scanning... Found {found} images... ({stats.folders} folders)")
+    finally:
+        # Runs on completion and when the caller stops early (result cap reached)
+        show_crawl_errors(stats)
+        status_text.empty()
+        st.sidebar.caption(f"Last crawl: {stats.summary()}")
+
+def search_many_recursive(service_factory, root_folder_id, matcher):
+    """Bulk lookup without the index: one crawl of the whole tree, every file name checked against all IDs."""
+    stats = CrawlStats()
+    images = []
+    status_text = st.sidebar.empty()
+
+    try:
+        for folder_id, items in crawl_tree(service_factory, root_folder_id, stats=stats):
+            images.extend(item for item in items if "image/" in item.get('mimeType', ''))
+            status_text.text(f"Scanning... {len(images)} images... ({stats.folders} folders)")
+    finally:
+        show_crawl_errors(stats)
+        status_text.empty()
+        st.sidebar.caption(f"Last crawl: {stats.summary()}")
+    return matcher.group(images)
+
+@st.cache_resource
+def get_drive_index(root_folder_id):
+    """One index per root folder, shared by every session."""
+    return DriveIndex(root_folder_id)
+
+@st.cache_resource
+def get_query_cache():
+    """Search results shared by every session on this server."""
+    return QueryCache()
+
+@st.cache_resource
+def get_thumbnail_cache():
+    """Thumbnails are fetched server-side with the service account and kept on local disk."""
+    session = AuthorizedSession(get_drive_credentials())
+    service_factory = get_service_factory()
+    services = threading.local()   # get_many fetches in parallel, and Drive clients aren't thread-safe
+
+    def fetch(url):
+        response = session.get(url, timeout=15)
+        response.raise_for_status()
+        return response.content
+
+    def link(file_id):
+        # Indexed items carry no thumbnailLink (they expire), so ask Drive for a current one
+        if getattr(services, 'drive', None) is None:
+            services.drive = service_factory()
+        return execute_with_backoff(services.drive.files().get(fileId=file_id, fields="thumbnailLink")).get('thumbnailLink')
+
+    return ThumbnailCache(fetch=fetch, link=link)
+
+@st.cache_resource
+def open_inventory_store(path):
+    return InventoryStore(path)
+
+def get_inventory_store():
+    """None while there is no local store, e.g. on Streamlit Cloud; picked up as soon as one is created."""
+    return open_inventory_store(INVENTORY_DB) if os.path.exists(INVENTORY_DB) else None
+
+def refresh_index(service_factory, index):
+    """Builds the index or syncs it if stale. Returns True if its contents may have changed.
+
+    If a sync fails, searches are answered from the index as it was; if the
+    first build fails there is nothing to answer from, so the run stops there.
+    """
+    if not index.is_built:
         try:
-            q = (
-                f"'{current_id}' in parents "
-                f"and (name contains '{query_text}' or mimeType = 'application/vnd.google-apps.folder') "
-                f"and trashed = false"
-            )
-            results = service.files().list(
-                q=q, 
-                fields="files(id, name, mimeType, webContentLink, thumbnailLink)",
-                pageSize=1000 
-            ).execute()
-            
-            items = results.get('files', [])
-            
-            for item in items:
-                if item['mimeType'] == 'application/vnd.google-apps.folder':
-                    folder_stack.append(item['id'])
-                elif query_text.lower() in item['name'].lower() and "image/" in item.get('mimeType', ''):
-                    found_files.append(item)
-            
-            status_text.text(f"Scanning... Found {len(found_files)} images...")
-            
+            with st.spinner("Building folder index (first run only)..."):
+                stats = index.rebuild(service_factory)
         except Exception as e:
-            st.sidebar.warning(f"Error reading folder {current_id}: {e}")
-            
-    status_text.empty()
-    return found_files
+            st.error(f"Could not build the folder index: {e}. Turn off \"Use local index\" to search Drive directly.")
+            st.stop()
+        show_crawl_errors(stats)
+        st.sidebar.caption(f"Index build: {stats.summary()}")
+        return True
+    if index.age() > INDEX_SYNC_INTERVAL:
+        try:
+            return index.sync(service_factory) > 0
+        except Exception as e:
+            st.warning(f"Could not sync the folder index, showing results as of {format_age(index.age())}: {e}")
+    return False
+
+def show_item(item, thumb_path=None):
+    if thumb_path:
+        st.image(thumb_path, use_column_width=True)
+    elif 'thumbnailLink' in item:
+        st.image(item['thumbnailLink'], use_column_width=True)
+    store = get_inventory_store()
+    qty = store.get(os.path.splitext(item['name'])[0]) if store is not None else None
+    st.caption(item['name'] if qty is None else f"{item['name']} · Qty: {qty}")
+    st.markdown(f"[View Full Size]({item['webContentLink']})")
+
+def stream_results(results, limit, page_size, thumbs):
+    """Renders the first page of matches as they arrive and keeps collecting up to limit.
+
+    Returns every item collected, including the ones past the first page.
+    """
+    # Wide layout allows for 5 images per row
+    cols = st.columns(5)
+    found = []
+    started = time.perf_counter()
+    results = iter(results)
+    try:
+        for item in results:
+            if len(found) < page_size:
+                with cols[len(found) % 5]:
+                    show_item(item, thumbs.get(item))
+            if not found:
+                st.sidebar.caption(f"First result in {time.perf_counter() - started:.2f}s")
+                METRICS.observe("first_result", time.perf_counter() - started)
+            found.append(item)
+            if len(found) >= limit:
+                break
+    finally:
+        # Closing a crawl generator cancels the folders it has not listed yet
+        if hasattr(results, 'close'):
+            results.close()
+    return found
+
+def show_page(items, page, page_size, thumbs):
+    page_items = items[page * page_size:(page + 1) * page_size]
+    thumb_paths = thumbs.get_many(page_items)
+    cols = st.columns(5)
+    for index, (item, thumb_path) in enumerate(zip(page_items, thumb_paths)):
+        with cols[index % 5]:
+            show_item(item, thumb_path)
+
+def show_bulk_results(ids, groups, thumbs):
+    """One row of thumbnails per ID, in the order they were pasted; IDs with no image are listed up top."""
+    missing = [item_id for item_id in ids if not groups[item_id]]
+    st.markdown(f"### {len(ids) - len(missing)} of {len(ids)} IDs found")
+    if missing:
+        st.error(f"Not found: {', '.join(missing)}")
+
+    for item_id in ids:
+        items = groups[item_id]
+        if not items:
+            continue
+        st.markdown(f"#### {item_id} · {len(items)} image{'s' if len(items) != 1 else ''}")
+        shown = items[:BULK_IMAGES_PER_ID]
+        cols = st.columns(5)
+        for index, (item, thumb_path) in enumerate(zip(shown, thumbs.get_many(shown))):
+            with cols[index % 5]:
+                show_item(item, thumb_path)
+        if len(items) > len(shown):
+            st.caption(f"{len(items) - len(shown)} more; search {item_id} on its own to see them all.")
+
+def change_page(step):
+    st.session_state.page += step
+
+def page_controls(total, page_size):
+    pages = max(1, math.ceil(total / page_size))
+    page = st.session_state.page
+    p1, p2, p3 = st.columns([1, 3, 1])
+    with p1:
+        st.button("◀ Prev", disabled=page == 0, on_click=change_page, args=(-1,), use_container_width=True)
+    with p2:
+        st.markdown(f"<div style='text-align: center'>Page {page + 1} of {pages} · {total} images</div>",
+                    unsafe_allow_html=True)
+    with p3:
+        st.button("Next ▶", disabled=page >= pages - 1, on_click=change_page, args=(1,), use_container_width=True)
 
 # --- 2. SIDEBAR (Title & Settings) ---
 with st.sidebar:
@@ -79,6 +264,54 @@ with st.sidebar:
     if not folder_id:
         st.info("Paste ID from Drive URL.")
 
+    result_cap = st.number_input("Result cap", min_value=5, max_value=2000, value=DEFAULT_RESULT_CAP, step=5,
+                                 help="Stop searching once this many images have been found.")
+    page_size = st.selectbox("Results per page", [10, 20, 50, 100], index=1)
+
+    use_index = st.toggle("Use local index", value=True)
+    if folder_id and use_index:
+        index = get_drive_index(folder_id)
+        if index.is_built:
+            stats = index.stats()
+            st.caption(f"Index: {stats['files']:,} files in {stats['folders']:,} folders · synced {format_age(index.age())}")
+            if index.failed_folders:
+                st.caption(f"{len(index.failed_folders)} folder(s) could not be read; retried on every sync.")
+        else:
+            st.caption("Index not built yet.")
+
+        b1, b2 = st.columns(2)
+        with b1:
+            if st.button("Sync now", use_container_width=True):
+                try:
+                    with st.spinner("Syncing changes..."):
+                        changed = index.sync(get_service_factory())
+                except Exception as e:
+                    st.warning(f"Sync failed: {e}")
+                else:
+                    if changed:
+                        get_query_cache().invalidate(folder_id)
+                    st.toast(f"{changed} changes applied.")
+        with b2:
+            if st.button("Full rebuild", use_container_width=True):
+                try:
+                    with st.spinner("Rebuilding index..."):
+                        stats = index.rebuild(get_service_factory())
+                except Exception as e:
+                    st.warning(f"Rebuild failed, keeping the index as it was: {e}")
+                else:
+                    show_crawl_errors(stats)
+                    get_query_cache().invalidate(folder_id)
+                    st.toast(f"Index rebuilt: {stats.summary()}")
+
+    # Filled in at the end of the run so the counters include this search
+    cache_status = st.empty()
+
+    # Metrics are process-wide, so only flip them when this session's toggle is actually changed
+    st.toggle("Debug metrics", value=METRICS.enabled, key="debug_metrics",
+              on_change=lambda: setattr(METRICS, 'enabled', st.session_state.debug_metrics),
+              help="Collect stage timings and counters (for everyone using this server).")
+    metrics_panel = st.empty()
+
 # --- 3. MAIN AREA (Search Bar & Results) ---
 
 # We use columns to make the search bar centered and not too wide
@@ -86,40 +319,104 @@ with st.sidebar:
 col_left, col_mid, col_right = st.columns([1, 6, 1])
 
 with col_mid:
-    with st.form("search_form", clear_on_submit=True):
-        # Search input and button side-by-side
-        c1, c2 = st.columns([4, 1]) 
-        with c1:
-            query_text = st.text_input("Search", placeholder="Enter filename...", label_visibility="collapsed")
-        with c2:
-            submitted = st.form_submit_button("Search", type="primary", use_container_width=True)
+    bulk_mode = st.toggle("Bulk lookup", help="Paste all the item IDs of an order and look them up in one pass.")
+    submitted = bulk_submitted = False
+    if bulk_mode:
+        with st.form("bulk_form"):
+            id_text = st.text_area("Item IDs", placeholder="One per line, or separated by spaces or commas",
+                                   label_visibility="collapsed")
+            bulk_submitted = st.form_submit_button("Look up all", type="primary", use_container_width=True)
+    else:
+        with st.form("search_form", clear_on_submit=True):
+            # Search input and button side-by-side
+            c1, c2 = st.columns([4, 1]) 
+            with c1:
+                query_text = st.text_input("Search", placeholder="Enter filename...", label_visibility="collapsed")
+            with c2:
+                submitted = st.form_submit_button("Search", type="primary", use_container_width=True)
+        # Search with the same text the cache is keyed on, so a cached and a live answer always agree
+        query_text = clean_query(query_text)
 
 # Logic
-if submitted and query_text:
+if bulk_mode:
+    ids = parse_id_list(id_text)
+    if bulk_submitted and ids:
+        if not folder_id:
+            st.error("⚠️ Please enter a Folder ID in the sidebar (left).")
+        else:
+            # All IDs are matched in one pass over the tree instead of one crawl per ID
+            search_started = time.perf_counter()
+            matcher = IdMatcher(ids)
+            service_factory = get_service_factory()
+            with st.spinner(f"Looking up {len(ids)} IDs..."):
+                if use_index:
+                    index = get_drive_index(folder_id)
+                    if refresh_index(service_factory, index):
+                        get_query_cache().invalidate(folder_id)
+                    groups = index.search_many(matcher)
+                else:
+                    groups = search_many_recursive(service_factory, folder_id, matcher)
+            METRICS.observe("bulk_search", time.perf_counter() - search_started)
+            st.session_state.bulk_results = (ids, groups)
+            st.sidebar.caption(f"Bulk lookup: {len(ids)} IDs in {time.perf_counter() - search_started:.2f}s")
+
+    if st.session_state.bulk_results:
+        show_bulk_results(*st.session_state.bulk_results, get_thumbnail_cache())
+
+elif submitted and query_text:
     if not folder_id:
         st.error("⚠️ Please enter a Folder ID in the sidebar (left).")
     else:
-        service = get_drive_service()
+        st.session_state.last_query = query_text
+        st.session_state.page = 0
+        st.markdown(f"### Results for: *{query_text}*")
+
+        search_started = time.perf_counter()
+        service_factory = get_service_factory()
+        cache = get_query_cache()
+        if use_index and refresh_index(service_factory, get_drive_index(folder_id)):
+            cache.invalidate(folder_id)
+
+        results = cache.get(folder_id, query_text, result_cap)
+        from_cache = results is not None
+        crawl_stats = CrawlStats()
+        if not from_cache:
+            if use_index:
+                results = get_drive_index(folder_id).search(query_text)
+            else:
+                results = search_recursive(service_factory, folder_id, query_text, crawl_stats)
+
         with st.spinner("Searching entire folder tree..."):
-            results = search_recursive(service, folder_id, query_text)
-            st.session_state.search_results = results
-            st.session_state.last_query = query_text
+            items = stream_results(results, result_cap, page_size, get_thumbnail_cache())
+        METRICS.observe("search", time.perf_counter() - search_started)
+        st.session_state.search_results = items
+        # Matches in folders that couldn't be read are missing; don't serve that to later searches
+        if not from_cache and not crawl_stats.errors:
+            cache.put(folder_id, query_text, items, complete=len(items) < result_cap)
+
+        if not items:
+            st.info("No images found.")
+        else:
+            page_controls(len(items), page_size)
+            if len(items) >= result_cap:
+                st.caption(f"Stopped at the first {result_cap} matches. Refine the search or raise the result cap to see more.")
 
 # Results Display
-if st.session_state.last_query:
+elif st.session_state.last_query:
     st.markdown(f"### Results for: *{st.session_state.last_query}*")
 
-items = st.session_state.search_results
+    items = st.session_state.search_results
+    if items:
+        last_page = max(0, math.ceil(len(items) / page_size) - 1)
+        st.session_state.page = min(st.session_state.page, last_page)
+        show_page(items, st.session_state.page, page_size, get_thumbnail_cache())
+        page_controls(len(items), page_size)
 
-if items:
-    # Wide layout allows for 5 images per row
-    cols = st.columns(5)
-    for index, item in enumerate(items):
-        with cols[index % 5]:
-            if 'thumbnailLink' in item:
-                st.image(item['thumbnailLink'], use_column_width=True)
-            st.caption(item['name'])
-            st.markdown(f"[View Full Size]({item['webContentLink']})")
+cache_stats = get_query_cache().stats()
+cache_status.caption(
+    f"Query cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses "
+    f"({cache_stats['hit_rate']:.0%}) · {cache_stats['entries']} entries"
+)
 
-elif submitted:
-    st.info("No images found.")
\ No newline at end of file
+if METRICS.enabled:
+    metrics_panel.code("\n".join(METRICS.summary_lines()), language=None)
\ No newline at end of file
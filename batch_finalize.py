@@ -0,0 +1,126 @@
+"""Finalize a large file of sales without the InventoryApp grid.
+
+Reads TSV/CSV in the format "Copy Grid" produces (optional Start Time
+line, Buyer + Item ID columns), streams it in chunks, checks every item
+with the same rules as Finalize Transaction (invalid ID, oversold) and
+applies the whole file as one transaction, or nothing if any row fails:
+
+    python batch_finalize.py sales.tsv --inventory inventory.json --report errors.tsv
+
+With a JSON inventory the sale is journaled like a register sale, so
+it is refused while InventoryApp has the file open (it would overwrite
+the journal on its next save); with an inventory store (.db) the apps
+can stay open.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from inventory_journal import InventoryJournal
+from inventory_store import InventoryStore, StockError, is_store_path
+from transactions import find_problems, row_items
+
+DEFAULT_CHUNK_ROWS = 10000
+
+
+def read_chunks(path, delimiter, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yields lists of (line number, row) for the sales rows of path, chunk_rows at a time."""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        rows = ((reader.line_num, row) for row in reader if is_sales_row(row))
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                return
+            yield chunk
+
+
+def is_sales_row(row):
+    if not row or not any(cell.strip() for cell in row):
+        return False
+    first = row[0].strip()
+    return first != "Buyer" and not first.startswith("Start Time:")
+
+
+def error_rows(path, delimiter, problems):
+    """Second pass over the file: (line, buyer, item id, reason) for every cell behind a problem."""
+    reasons = dict(problems)
+    for chunk in read_chunks(path, delimiter):
+        for line_no, row in chunk:
+            for item_id in row_items(row):
+                if item_id in reasons:
+                    yield line_no, row[0].strip(), item_id, reasons[item_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and apply a TSV/CSV file of sales in one transaction.")
+    parser.add_argument("sales_file")
+    parser.add_argument("--inventory", default="inventory.json", help="inventory JSON file or store (.db)")
+    parser.add_argument("--delimiter", help="field separator (default: ',' for .csv, tab otherwise)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--report", help="write the per-row error report here instead of stderr")
+    parser.add_argument("--dry-run", action="store_true", help="validate only")
+    args = parser.parse_args()
+    delimiter = args.delimiter or ("," if args.sales_file.lower().endswith(".csv") else "\t")
+    for path in (args.sales_file, args.inventory):
+        if not os.path.exists(path):
+            sys.exit(f"error: {path} not found")
+
+    started = time.perf_counter()
+    counts, rows = Counter(), 0
+    for chunk in read_chunks(args.sales_file, delimiter, args.chunk_rows):
+        for _, row in chunk:
+            counts.update(row_items(row))
+        rows += len(chunk)
+    read_time = time.perf_counter() - started
+
+    if is_store_path(args.inventory):
+        store, journal = InventoryStore(args.inventory), None
+        inventory = store.get_many(counts)
+    else:
+        store, journal = None, InventoryJournal(args.inventory)
+        if not args.dry_run and not journal.lock():
+            sys.exit(f"error: {args.inventory} is open in InventoryApp; close it first, or use the inventory store (.db)")
+        inventory = journal.load()
+    problems = find_problems(inventory, counts)
+    validate_time = time.perf_counter() - started - read_time
+
+    applied = False
+    if not problems and not args.dry_run and counts:
+        if store is not None:
+            try:
+                store.decrement(counts)
+                applied = True
+            except StockError as e:
+                # Another register sold some of these between validation and now
+                problems = e.problems
+        else:
+            # One journal line: replay applies all of it or, if torn, none of it
+            journal.append({item_id: -qty for item_id, qty in counts.items()})
+            applied = True
+    elapsed = time.perf_counter() - started
+
+    if problems:
+        out = open(args.report, 'w', newline='') if args.report else sys.stderr
+        try:
+            writer = csv.writer(out, delimiter="\t")
+            writer.writerow(["Line", "Buyer", "Item ID", "Problem"])
+            writer.writerows(error_rows(args.sales_file, delimiter, problems))
+        finally:
+            if args.report:
+                out.close()
+
+    print(f"{rows:,} rows, {sum(counts.values()):,} items ({len(counts):,} distinct)")
+    print(f"read {read_time:.2f}s · validate {validate_time:.2f}s · total {elapsed:.2f}s · {rows / max(elapsed, 1e-9):,.0f} rows/s")
+    if problems:
+        print(f"NOT applied: {len(problems):,} item(s) invalid or oversold" + (f", see {args.report}" if args.report else ""))
+        sys.exit(1)
+    print("Applied." if applied else "Valid; nothing applied.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Offline benchmark for the Drive search path.
+
+Runs the crawl engine and the folder index against a synthetic FakeDrive
+tree and reports wall time, API calls and peak memory, e.g.:
+
+    python bench_drive_crawl.py --depth 4 --fanout 5 --files 20 --latency 0.02 --workers 1 8 16
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import drive_crawl
+from drive_crawl import CrawlStats, crawl_tree
+from drive_index import DriveIndex
+from fake_drive import FakeDrive
+
+
+def measure(drive, fn):
+    """Runs fn() and returns (result, wall seconds, API calls, peak bytes)."""
+    calls_before = drive.api_calls
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, drive.api_calls - calls_before, peak
+
+
+def bench_search(drive, query, workers):
+    """Same filtering as ItemLookUp.search_recursive, without the Streamlit UI."""
+    needle = query.lower()
+    stats = CrawlStats()
+
+    def run():
+        found = 0
+        for _, items in crawl_tree(drive.service, drive.root_id, name_contains=query,
+                                   max_workers=workers, stats=stats):
+            for item in items:
+                if needle in item['name'].lower() and "image/" in item.get('mimeType', ''):
+                    found += 1
+        return found
+
+    found, elapsed, calls, peak = measure(drive, run)
+    return {
+        'name': f"crawl search  workers={workers:<3}",
+        'found': found, 'seconds': elapsed, 'api_calls': calls, 'peak_bytes': peak,
+        'folders': stats.folders, 'retries': stats.retries, 'errors': len(stats.errors),
+    }
+
+
+def bench_index(drive, query, workers):
+    """Full index build, then one query answered from the index."""
+    results = []
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = DriveIndex(drive.root_id, index_dir=index_dir, max_workers=workers)
+        stats, elapsed, calls, peak = measure(drive, lambda: index.rebuild(drive.service))
+        results.append({
+            'name': f"index rebuild workers={workers:<3}",
+            'found': index.stats()['files'], 'seconds': elapsed, 'api_calls': calls, 'peak_bytes': peak,
+            'folders': stats.folders, 'retries': stats.retries, 'errors': len(stats.errors),
+        })
+
+        found, elapsed, calls, peak = measure(drive, lambda: len(index.search(query)))
+        results.append({
+            'name': "index search",
+            'found': found, 'seconds': elapsed, 'api_calls': calls, 'peak_bytes': peak,
+            'folders': 0, 'retries': 0, 'errors': 0,
+        })
+    return results
+
+
+def format_row(r):
+    return (f"{r['name']:<28} {r['seconds']:>8.3f}s {r['api_calls']:>7} calls "
+            f"{r['peak_bytes'] / 1024 / 1024:>7.1f} MiB  {r['found']:>7} found  "
+            f"{r['folders']:>6} folders  {r['retries']:>4} retries  {r['errors']:>3} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Drive crawl against an in-memory fake Drive.")
+    parser.add_argument("--depth", type=int, default=3, help="folder levels below the root")
+    parser.add_argument("--fanout", type=int, default=4, help="subfolders per folder")
+    parser.add_argument("--files", type=int, default=20, help="images per folder")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every API call")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of calls answered 403/429")
+    parser.add_argument("--backoff", type=float, default=0.01, help="base retry backoff in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, drive_crawl.DEFAULT_WORKERS])
+    parser.add_argument("--query", default="K1", help="name fragment to search for")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-index", action="store_true", help="only benchmark the live crawl")
+    parser.add_argument("--output", help="also append the report to this file")
+    args = parser.parse_args()
+
+    drive_crawl.BACKOFF_BASE = args.backoff
+    drive = FakeDrive(depth=args.depth, fanout=args.fanout, files_per_folder=args.files,
+                      latency=args.latency, error_rate=args.rate_limit, seed=args.seed)
+
+    lines = [
+        f"Fake Drive: {drive.folder_count:,} folders, {drive.file_count:,} files, "
+        f"latency {args.latency * 1000:.0f} ms/call, rate-limit {args.rate_limit:.0%}",
+        "",
+    ]
+    for workers in args.workers:
+        lines.append(format_row(bench_search(drive, args.query, workers)))
+    if not args.skip_index:
+        for workers in args.workers:
+            lines.extend(format_row(r) for r in bench_index(drive, args.query, workers))
+
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(report + os.linesep)
+
+
+if __name__ == "__main__":
+    main()
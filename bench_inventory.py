@@ -0,0 +1,136 @@
+"""Benchmark for the in-memory inventory representation.
+
+Compares the plain dict InventoryApp used to keep with CompactInventory
+on a synthetic catalog: memory held (by the inventory, and by the ID
+suggestion index InventoryApp builds over it), load (normalize) time,
+sorted display order, point lookups, and validating + applying
+transactions:
+
+    python bench_inventory.py --skus 100000 500000 --transactions 2000 --items 40
+"""
+import argparse
+import gc
+import os
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+from compact_inventory import CompactInventory
+from id_index import IdIndex
+from inventory_journal import InventoryJournal
+from transactions import find_problems
+
+
+def synthetic_catalog(skus, seed):
+    """Raw JSON-style inventory with mixed-case IDs, as a register might load it."""
+    rng = random.Random(seed)
+    return {f"{rng.choice('kKsS')}{i:07d}": rng.randint(0, 500) for i in range(skus)}
+
+
+def synthetic_transactions(ids, count, items, seed):
+    rng = random.Random(seed)
+    return [Counter(rng.choice(ids) for _ in range(items)) for _ in range(count)]
+
+
+def held_bytes(build):
+    """(object, bytes still allocated once build() returns, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return built, current, elapsed
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def finalize_dict(inventory, transactions):
+    """What finalize_transaction did per sale: find_problems, then a dict update per item."""
+    sold = 0
+    for counts in transactions:
+        if find_problems(inventory, counts):
+            continue
+        for item_id, qty in counts.items():
+            inventory[item_id] -= qty
+        sold += 1
+    return sold
+
+
+def finalize_compact(inventory, transactions):
+    sold = 0
+    for counts in transactions:
+        if inventory.check(counts):
+            continue
+        inventory.decrement(counts)
+        sold += 1
+    return sold
+
+
+def bench(skus, n_transactions, items, seed):
+    raw = synthetic_catalog(skus, seed)
+    results = {}
+    for name, build in (("dict", lambda: InventoryJournal.normalize(raw)),
+                        ("compact", lambda: CompactInventory(raw))):
+        inventory, held, load_seconds = held_bytes(build)
+        # The full IdIndex the dict version built, or the light one that reads the compact IDs in place
+        index, index_held, _ = held_bytes(
+            lambda inventory=inventory, name=name: IdIndex(inventory) if name == "dict" else inventory.id_index())
+        del index
+        ids = sorted(inventory)
+        _, sort_seconds = timed(lambda inventory=inventory, name=name: sorted(inventory) if name == "dict" else list(inventory))
+        probes = [random.Random(seed).choice(ids) for _ in range(100000)]
+        _, lookup_seconds = timed(lambda inventory=inventory: [inventory.get(item_id) for item_id in probes])
+        transactions = synthetic_transactions(ids, n_transactions, items, seed)
+        finalize = finalize_dict if name == "dict" else finalize_compact
+        sold, finalize_seconds = timed(lambda inventory=inventory: finalize(inventory, transactions))
+        results[name] = {
+            'held_bytes': held, 'index_bytes': index_held, 'load': load_seconds, 'sort': sort_seconds,
+            'lookup_us': lookup_seconds / len(probes) * 1e6,
+            'finalize_us': finalize_seconds / n_transactions * 1e6, 'sold': sold,
+        }
+        # Drop this build before measuring the next one
+        del inventory
+    return results
+
+
+def format_row(skus, name, r):
+    return (f"{skus:>9,} SKUs  {name:<8} {r['held_bytes'] / 1024 / 1024:>7.1f} MiB "
+            f"+ index {r['index_bytes'] / 1024 / 1024:>6.1f} MiB  "
+            f"load {r['load'] * 1000:>7.1f} ms  sorted ids {r['sort'] * 1000:>6.1f} ms  "
+            f"lookup {r['lookup_us']:>5.2f} µs  finalize {r['finalize_us']:>6.1f} µs/txn  ({r['sold']} sold)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dict and CompactInventory memory and speed.")
+    parser.add_argument("--skus", type=int, nargs="+", default=[100000, 500000])
+    parser.add_argument("--transactions", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=40, help="items per transaction")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also append the report to this file")
+    args = parser.parse_args()
+
+    lines = []
+    for skus in args.skus:
+        results = bench(skus, args.transactions, args.items, args.seed)
+        lines.extend(format_row(skus, name, r) for name, r in results.items())
+        held = {name: r['held_bytes'] + r['index_bytes'] for name, r in results.items()}
+        saved = 1 - held['compact'] / held['dict']
+        lines.append(f"{'':>15}memory saved, including the ID index: {saved:.0%}")
+
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(report + os.linesep)
+
+
+if __name__ == "__main__":
+    main()
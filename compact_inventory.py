@@ -0,0 +1,191 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import ItemsView, MutableMapping, Sequence
+from itertools import accumulate
+
+from id_index import IdIndex, normalize_id
+from inventory_store import StockError
+from transactions import find_problems
+
+# Every FENCE_EVERY-th ID is also kept as its own bytes object, so a lookup
+# only bisects a short run of the buffer in Python code
+FENCE_EVERY = 32
+
+# Quantities are kept as signed 64-bit ints
+QTY_TYPECODE = 'q'
+QTY_LIMIT = 2 ** 63
+
+
+def whole_quantity(item_id, qty):
+    """qty as an int. JSON inventories may hold whole floats such as 5.0; anything else is refused by name."""
+    try:
+        count = int(qty)
+    except (TypeError, ValueError, OverflowError):
+        count = None
+    if count is None or count != qty or not -QTY_LIMIT <= count < QTY_LIMIT:
+        raise ValueError(f"Item '{item_id}' has a quantity that isn't a whole number of units: {qty!r}")
+    return count
+
+
+class EncodedIds(Sequence):
+    """The sorted IDs as UTF-8 byte strings, sliced out of one buffer on demand (for bisect)."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, slot):
+        return self.blob[self.offsets[slot]:self.offsets[slot + 1]]
+
+
+class SortedIds(Sequence):
+    """An inventory's IDs as strings, in sorted order, decoded on demand (for IdIndex.over_sorted)."""
+
+    def __init__(self, inventory):
+        self.inventory = inventory
+
+    def __len__(self):
+        return len(self.inventory)
+
+    def __getitem__(self, slot):
+        return self.inventory.id_at(slot)
+
+
+class CompactItemsView(ItemsView):
+    """items() that walks the ID buffer and the quantity array together, without a lookup per ID."""
+
+    def __iter__(self):
+        return zip(self._mapping, self._mapping.qty)
+
+
+class CompactInventory(MutableMapping):
+    """Item ID -> quantity for very large catalogs, without a Python object per item.
+
+    Normalized IDs are stored once, sorted, as UTF-8 in a single bytes
+    buffer with an array of offsets into it. An ID's position in that order
+    is its slot in a 64-bit array of quantities, and slots are what the
+    inventory panel keeps instead of ID strings. Lookups are a binary
+    search over the buffer (a few microseconds) instead of a hash. Adding or
+    removing an ID rebuilds the buffer, which is fine for the occasional new
+    SKU from a pull but not for bulk loads: build those from a dict instead.
+
+    Works anywhere the apps expect a dict; check() and decrement() resolve
+    a whole transaction's slots once and apply it all or nothing.
+    Quantities must be whole numbers: whole floats from JSON (5.0) are
+    converted, anything else raises ValueError naming the item.
+    """
+
+    def __init__(self, data=()):
+        pairs = data.items() if hasattr(data, 'items') else data
+        merged = {normalize_id(item_id): qty for item_id, qty in pairs}
+        ids = sorted(merged)
+        self._build(ids, [whole_quantity(item_id, merged[item_id]) for item_id in ids])
+
+    def _build(self, ids, quantities):
+        text = "".join(ids)
+        self.blob = text.encode()
+        # Plain ASCII IDs (the usual case) have byte offsets equal to character offsets
+        self.ascii = len(self.blob) == len(text)
+        lengths = map(len, ids) if self.ascii else (len(item_id.encode()) for item_id in ids)
+        self.offsets = array('I', accumulate(lengths, initial=0))
+        self.encoded = EncodedIds(self.blob, self.offsets)
+        self.fences = [self.encoded[i] for i in range(0, len(ids), FENCE_EVERY)]
+        self.qty = array(QTY_TYPECODE, quantities)
+
+    # --- Slots ---
+    def slot(self, item_id):
+        """Position of item_id (already normalized) in sorted order, or -1."""
+        key = item_id.encode()
+        fence = bisect_right(self.fences, key)
+        if not fence:
+            return -1
+        lo = (fence - 1) * FENCE_EVERY
+        pos = bisect_left(self.encoded, key, lo, min(lo + FENCE_EVERY, len(self.qty)))
+        return pos if pos < len(self.qty) and self.encoded[pos] == key else -1
+
+    def id_at(self, slot):
+        return self.encoded[slot].decode()
+
+    # --- Mapping interface ---
+    def __getitem__(self, item_id):
+        pos = self.slot(item_id)
+        if pos < 0:
+            raise KeyError(item_id)
+        return self.qty[pos]
+
+    def __setitem__(self, item_id, qty):
+        qty = whole_quantity(item_id, qty)
+        pos = self.slot(item_id)
+        if pos >= 0:
+            self.qty[pos] = qty
+            return
+        ids = list(self)
+        pos = bisect_left(ids, item_id)
+        ids.insert(pos, item_id)
+        quantities = self.qty.tolist()
+        quantities.insert(pos, qty)
+        self._build(ids, quantities)
+
+    def __delitem__(self, item_id):
+        pos = self.slot(item_id)
+        if pos < 0:
+            raise KeyError(item_id)
+        ids, quantities = list(self), self.qty.tolist()
+        del ids[pos], quantities[pos]
+        self._build(ids, quantities)
+
+    def __contains__(self, item_id):
+        return self.slot(item_id) >= 0
+
+    def __iter__(self):
+        """IDs in sorted order."""
+        offsets = self.offsets
+        if self.ascii:
+            text = self.blob.decode('ascii')
+            return map(text.__getitem__, map(slice, offsets, offsets[1:]))
+        blob = self.blob
+        return (blob[offsets[i]:offsets[i + 1]].decode() for i in range(len(self.qty)))
+
+    def __len__(self):
+        return len(self.qty)
+
+    def items(self):
+        """(id, qty) pairs in sorted ID order."""
+        return CompactItemsView(self)
+
+    def to_dict(self):
+        """Plain dict, for JSON snapshots."""
+        return dict(self.items())
+
+    def id_index(self):
+        """IdIndex for suggestions that reads the IDs from this inventory instead of copying them."""
+        alphabet = set(self.blob.decode())
+        return IdIndex.over_sorted(SortedIds(self), self.__contains__, alphabet)
+
+    # --- Batch operations ---
+    def slots(self, counts):
+        """[(slot or -1, item id, quantity)] for a {item id: quantity} transaction, in counts order."""
+        return [(self.slot(item_id), item_id, qty) for item_id, qty in counts.items()]
+
+    def check(self, counts, resolved=None):
+        """transactions.find_problems(self, counts), resolving each ID once."""
+        if resolved is None:
+            resolved = self.slots(counts)
+        return find_problems({item_id: self.qty[pos] for pos, item_id, _ in resolved if pos >= 0}, counts)
+
+    def decrement(self, counts):
+        """Sells a whole transaction, or nothing (StockError) if any item is invalid or oversold.
+
+        Returns the IDs that are now out of stock.
+        """
+        resolved = self.slots(counts)
+        problems = self.check(counts, resolved)
+        if problems:
+            raise StockError(problems)
+        qty = self.qty
+        for pos, _, qty_used in resolved:
+            qty[pos] -= qty_used
+        return [item_id for pos, item_id, _ in resolved if qty[pos] == 0]
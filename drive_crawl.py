@@ -0,0 +1,172 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metrics import METRICS
+
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+
+DEFAULT_FIELDS = "id, name, mimeType, webContentLink, thumbnailLink"
+
+# Drive allows a fair amount of parallelism per user before it starts answering 403/429
+DEFAULT_WORKERS = 8
+
+# Retry policy for rate-limit and transient server errors
+MAX_RETRIES = 6
+BACKOFF_BASE = 0.5   # seconds, doubled on every attempt
+BACKOFF_MAX = 32.0
+
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+
+class CrawlStats:
+    """Counters for one crawl. Safe to update from worker threads."""
+
+    def __init__(self):
+        self.folders = 0
+        self.api_calls = 0
+        self.retries = 0
+        self.errors = []          # (folder_id, exception) for folders that could not be listed
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def count_call(self):
+        with self._lock:
+            self.api_calls += 1
+
+    def count_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def folders_per_sec(self):
+        elapsed = self.elapsed
+        return self.folders / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.folders:,} folders · {self.api_calls:,} API calls · "
+                f"{self.folders_per_sec:.0f} folders/s · {self.elapsed:.1f}s")
+
+
+def is_retryable(error):
+    """True for Drive rate-limit (403/429) and transient 5xx responses."""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    if status == 429 or status >= 500:
+        return True
+    if status == 403:
+        content = getattr(error, 'content', b'') or b''
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', errors='replace')
+        return any(reason in content for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+def execute_with_backoff(request, stats=None):
+    """Executes a Drive API request, retrying with exponential backoff and jitter on rate limits."""
+    for attempt in range(MAX_RETRIES + 1):
+        if stats is not None:
+            stats.count_call()
+        METRICS.count("api_calls")
+        try:
+            with METRICS.timer("api_call"):
+                return request.execute()
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_retryable(e):
+                raise
+            if stats is not None:
+                stats.count_retry()
+            METRICS.count("api_retries")
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+            time.sleep(delay + random.uniform(0, BACKOFF_BASE))
+
+
+def escape_query(text):
+    """Escapes a value for use inside a single-quoted Drive query string."""
+    return text.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def crawl_tree(service_factory, root_folder_id, name_contains=None, fields=DEFAULT_FIELDS,
+               max_workers=DEFAULT_WORKERS, stats=None):
+    """Lists every folder under root_folder_id concurrently.
+
+    Yields (folder_id, items) for each page of results as soon as it arrives,
+    following nextPageToken until every folder is fully listed. When
+    name_contains is given, only matching files (plus all subfolders, so the
+    crawl can descend) are returned.
+
+    Drive clients are not thread-safe, so service_factory is called once per
+    worker thread to build its own client. Closing the generator early cancels
+    the folders that have not been listed yet.
+    """
+    stats = stats if stats is not None else CrawlStats()
+
+    q_filter = "trashed = false"
+    if name_contains:
+        q_filter = (f"(name contains '{escape_query(name_contains)}' or mimeType = '{FOLDER_MIME}') "
+                    f"and trashed = false")
+    page_fields = f"nextPageToken, files({fields})"
+
+    local = threading.local()
+
+    def list_page(folder_id, page_token):
+        service = getattr(local, 'service', None)
+        if service is None:
+            service = local.service = service_factory()
+        request = service.files().list(
+            q=f"'{folder_id}' in parents and {q_filter}",
+            fields=page_fields,
+            pageSize=1000,
+            pageToken=page_token
+        )
+        return execute_with_backoff(request, stats)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+
+    def submit(folder_id, page_token=None):
+        future = executor.submit(list_page, folder_id, page_token)
+        pending[future] = (folder_id, page_token)
+
+    stats.started_at = time.perf_counter()
+    submit(root_folder_id)
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                folder_id, page_token = pending.pop(future)
+                if page_token is None:
+                    stats.folders += 1
+                    METRICS.count("folders_visited")
+                try:
+                    results = future.result()
+                except Exception as e:
+                    stats.errors.append((folder_id, e))
+                    continue
+
+                next_token = results.get('nextPageToken')
+                if next_token:
+                    submit(folder_id, next_token)
+
+                items = results.get('files', [])
+                for item in items:
+                    if item['mimeType'] == FOLDER_MIME:
+                        submit(item['id'])
+
+                yield folder_id, items
+    finally:
+        stats.finished_at = time.perf_counter()
+        METRICS.observe("crawl", stats.elapsed)
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+
+from drive_crawl import DEFAULT_WORKERS, FOLDER_MIME, CrawlStats, crawl_tree, execute_with_backoff
+from metrics import METRICS
+
+# Where the per-root index files live (one JSON file per root folder ID)
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".drive_index")
+
+# No thumbnailLink: Drive's thumbnail links expire after a few hours, so the
+# thumbnail cache looks them up when it needs one instead
+FILE_FIELDS = "id, name, parents, mimeType, webContentLink, trashed"
+
+
+class ChildMap:
+    """parent id -> child ids for an index's entries, for removing whole subtrees.
+
+    Built on the first removal of a sync rather than once per removal, and
+    kept current as that sync adds, moves and removes entries.
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.children = None
+
+    def of(self, file_id):
+        if self.children is None:
+            self.children = {}
+            for fid, entry in self.files.items():
+                self.children.setdefault(entry['parent'], set()).add(fid)
+        return list(self.children.get(file_id, ()))
+
+    def moved(self, file_id, old_parent, new_parent):
+        if self.children is None:
+            return
+        if old_parent is not None:
+            self.children.get(old_parent, set()).discard(file_id)
+        if new_parent is not None:
+            self.children.setdefault(new_parent, set()).add(file_id)
+
+
+class DriveIndex:
+    """Local copy of one Drive folder tree, kept current with the Changes API.
+
+    Built once with a full crawl from the root folder, then updated by
+    replaying the Drive change feed since the last saved page token.
+    Folders a crawl couldn't list are remembered and crawled again on
+    every sync until they succeed.
+    """
+
+    def __init__(self, root_folder_id, index_dir=INDEX_DIR, max_workers=DEFAULT_WORKERS):
+        self.root_folder_id = root_folder_id
+        self.max_workers = max_workers
+        self.path = os.path.join(index_dir, f"{root_folder_id}.json")
+        self.files = {}        # file id -> {name, parent, mimeType, webContentLink}
+        self.page_token = None
+        self.built_at = None
+        self.synced_at = None
+        self.failed_folders = []   # folder ids whose listing failed, retried by sync()
+        self.lock = threading.RLock()
+        self.load()
+
+    # --- Persistence ---
+    def load(self):
+        """Loads the saved index from disk, if there is one."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with METRICS.timer("json_load"), open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Index Load Error: {e}")
+            return
+        if data.get('root_folder_id') != self.root_folder_id:
+            return
+        self.files = data.get('files', {})
+        for entry in self.files.values():
+            entry.pop('thumbnailLink', None)    # saved by older versions, long expired by now
+        self.page_token = data.get('page_token')
+        self.built_at = data.get('built_at')
+        self.synced_at = data.get('synced_at')
+        self.failed_folders = data.get('failed_folders', [])
+
+    def save(self):
+        """Writes the index to a temp file and swaps it in, so a crash never leaves half a file."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            'root_folder_id': self.root_folder_id,
+            'page_token': self.page_token,
+            'built_at': self.built_at,
+            'synced_at': self.synced_at,
+            'failed_folders': self.failed_folders,
+            'files': self.files,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    # --- Status ---
+    @property
+    def is_built(self):
+        return self.built_at is not None and self.page_token is not None
+
+    def age(self):
+        """Seconds since the index was last brought up to date, or None if never built."""
+        if self.synced_at is None:
+            return None
+        return time.time() - self.synced_at
+
+    def stats(self):
+        folders = sum(1 for f in self.files.values() if f['mimeType'] == FOLDER_MIME)
+        return {'folders': folders, 'files': len(self.files) - folders}
+
+    # --- Building & syncing ---
+    def rebuild(self, service_factory):
+        """Throws the current index away and crawls the whole tree again. Returns the crawl stats.
+
+        Folders in stats.errors are left out of the index until a sync manages to list them.
+        The crawl fills a new dict and only swaps it in at the end, so searches keep
+        using the old index meanwhile, and a crawl that raises leaves it untouched.
+        """
+        # Take the change token *before* crawling so edits made mid-crawl are replayed on the next sync
+        service = service_factory()
+        token = execute_with_backoff(service.changes().getStartPageToken())['startPageToken']
+        files = {}
+        stats = self._crawl(service_factory, self.root_folder_id, files)
+        with self.lock:
+            self.files = files
+            self.failed_folders = [folder_id for folder_id, _ in stats.errors]
+            self.page_token = token
+            self.built_at = self.synced_at = time.time()
+            self.save()
+            return stats
+
+    def sync(self, service_factory):
+        """Applies all changes since the last sync and retries failed folders.
+
+        Returns the number of changes seen, counting each retried folder as one.
+        """
+        if not self.is_built:
+            self.rebuild(service_factory)
+            return 0
+
+        service = service_factory()
+        with self.lock:
+            applied = 0
+            token = self.page_token
+            new_folders = []
+            children = ChildMap(self.files)
+            while token:
+                response = execute_with_backoff(service.changes().list(
+                    pageToken=token,
+                    includeRemoved=True,
+                    fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))",
+                    pageSize=1000
+                ))
+
+                for change in response.get('changes', []):
+                    self._apply_change(change, new_folders, children)
+                    applied += 1
+
+                if 'newStartPageToken' in response:
+                    self.page_token = response['newStartPageToken']
+                token = response.get('nextPageToken')
+
+            # Folders that were moved into the tree arrive without their contents
+            failed = []
+            for folder_id in new_folders + self.failed_folders:
+                if self._is_indexed_folder(folder_id):
+                    stats = self._crawl(service_factory, folder_id)
+                    failed.extend(fid for fid, _ in stats.errors)
+            applied += len(self.failed_folders)
+            self.failed_folders = failed
+
+            self.synced_at = time.time()
+            self.save()
+            return applied
+
+    def _apply_change(self, change, new_folders, children):
+        file_id = change['fileId']
+        item = change.get('file')
+
+        if change.get('removed') or not item or item.get('trashed'):
+            self._remove_subtree(file_id, children)
+            return
+
+        parent = next((p for p in item.get('parents', []) if self._is_indexed_folder(p)), None)
+        if parent is None:
+            # Moved out of the tree (or never part of it)
+            self._remove_subtree(file_id, children)
+            return
+
+        old = self.files.get(file_id)
+        is_new_folder = item['mimeType'] == FOLDER_MIME and old is None
+        self.files[file_id] = self._entry(item, parent)
+        children.moved(file_id, old and old['parent'], parent)
+        if is_new_folder:
+            new_folders.append(file_id)
+
+    def _crawl(self, service_factory, folder_id, files=None):
+        """Lists everything under folder_id into files (by default the index itself)."""
+        if files is None:
+            files = self.files
+        stats = CrawlStats()
+        for parent_id, items in crawl_tree(service_factory, folder_id, fields=FILE_FIELDS,
+                                             max_workers=self.max_workers, stats=stats):
+            for item in items:
+                files[item['id']] = self._entry(item, parent_id)
+        return stats
+
+    def _remove_subtree(self, file_id, children):
+        if file_id not in self.files:
+            return
+        stack = [file_id]
+        while stack:
+            current = stack.pop()
+            entry = self.files.pop(current, None)
+            if entry is not None:
+                children.moved(current, entry['parent'], None)
+            stack.extend(children.of(current))
+
+    def _is_indexed_folder(self, folder_id):
+        if folder_id == self.root_folder_id:
+            return True
+        entry = self.files.get(folder_id)
+        return entry is not None and entry['mimeType'] == FOLDER_MIME
+
+    @staticmethod
+    def _entry(item, parent):
+        return {
+            'name': item['name'],
+            'parent': parent,
+            'mimeType': item['mimeType'],
+            'webContentLink': item.get('webContentLink'),
+        }
+
+    # --- Queries ---
+    def search(self, query_text):
+        """Image files whose name contains query_text, in the same shape as the Drive API returns."""
+        needle = query_text.lower()
+        found_files = []
+        with METRICS.timer("index_search"), self.lock:
+            for file_id, entry in self.files.items():
+                if needle in entry['name'].lower() and "image/" in entry['mimeType']:
+                    found_files.append(self._item(file_id, entry))
+        return found_files
+
+    def search_many(self, matcher):
+        """{id: [image files]} for every ID of an IdMatcher, in a single pass over the index."""
+        with METRICS.timer("index_search_many"), self.lock:
+            images = ((file_id, entry) for file_id, entry in self.files.items() if "image/" in entry['mimeType'])
+            groups = matcher.group(images, name=lambda image: image[1]['name'])
+            return {item_id: [self._item(*image) for image in matched] for item_id, matched in groups.items()}
+
+    @staticmethod
+    def _item(file_id, entry):
+        return {'id': file_id, 'name': entry['name'], 'mimeType': entry['mimeType'],
+                'webContentLink': entry['webContentLink']}
+
+
+def format_age(seconds):
+    """Human-friendly 'how long ago' for the sidebar."""
+    if seconds is None:
+        return "never"
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} h ago"
+    return f"{int(seconds // 86400)} days ago"
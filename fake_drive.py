@@ -0,0 +1,188 @@
+"""In-memory stand-in for the parts of the Drive v3 client the search tools use.
+
+Builds a synthetic folder tree and answers service.files().list(...).execute()
+and service.changes() calls against it, with optional per-call latency and
+injected rate-limit errors. Used by bench_drive_crawl.py to measure the
+search path offline.
+"""
+import random
+import re
+import threading
+import time
+
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+
+PARENT_RE = re.compile(r"'([^']+)' in parents")
+NAME_RE = re.compile(r"name contains '((?:[^'\\]|\\.)*)'")
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "Too Many Requests" if status == 429 else "Forbidden"
+
+
+class FakeHttpError(Exception):
+    """Looks like googleapiclient.errors.HttpError to the retry logic (resp.status + content)."""
+
+    def __init__(self, status, reason='rateLimitExceeded'):
+        self.resp = FakeResponse(status)
+        self.content = f'{{"error": {{"errors": [{{"reason": "{reason}"}}]}}}}'.encode()
+        super().__init__(f"HTTP {status}: {reason}")
+
+
+class FakeRequest:
+    def __init__(self, drive, handler):
+        self.drive = drive
+        self.handler = handler
+
+    def execute(self):
+        self.drive.count_call()
+        if self.drive.latency:
+            time.sleep(self.drive.latency)
+        if self.drive.error_rate and self.drive.rng_random() < self.drive.error_rate:
+            raise FakeHttpError(429 if self.drive.rng_random() < 0.5 else 403)
+        return self.handler()
+
+
+class FakeFiles:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def list(self, q, fields=None, pageSize=100, pageToken=None, **kwargs):
+        return FakeRequest(self.drive, lambda: self.drive.list_children(q, pageSize, pageToken))
+
+
+class FakeChanges:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def getStartPageToken(self, **kwargs):
+        return FakeRequest(self.drive, lambda: {'startPageToken': str(len(self.drive.changes))})
+
+    def list(self, pageToken, pageSize=100, **kwargs):
+        return FakeRequest(self.drive, lambda: self.drive.list_changes(pageToken, pageSize))
+
+
+class FakeService:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def files(self):
+        return FakeFiles(self.drive)
+
+    def changes(self):
+        return FakeChanges(self.drive)
+
+
+class FakeDrive:
+    """A synthetic Drive tree.
+
+    depth levels of folders below the root, fanout subfolders per folder and
+    files_per_folder images in every folder (including the root). File names
+    look like inventory IDs ('K0001.jpg', 'K0002.jpg', ...).
+    """
+
+    def __init__(self, depth=3, fanout=4, files_per_folder=20, latency=0.0, error_rate=0.0,
+                 seed=0, root_id='root'):
+        self.root_id = root_id
+        self.latency = latency
+        self.error_rate = error_rate
+        self.children = {}      # folder id -> list of file dicts
+        self.changes = []       # change records, appended by the mutators below
+        self.api_calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._next_name = 0
+        self._build(root_id, depth, fanout, files_per_folder)
+
+    # --- Tree generation ---
+    def _new_id(self, prefix):
+        self._next_id += 1
+        return f"{prefix}{self._next_id:07d}"
+
+    def _build(self, folder_id, depth, fanout, files_per_folder):
+        stack = [(folder_id, depth)]
+        while stack:
+            current, remaining = stack.pop()
+            kids = self.children.setdefault(current, [])
+            for _ in range(files_per_folder):
+                self._next_name += 1
+                kids.append(self._file(self._new_id('f'), f"K{self._next_name:04d}.jpg", 'image/jpeg', current))
+            if remaining > 0:
+                for n in range(fanout):
+                    sub_id = self._new_id('d')
+                    kids.append(self._file(sub_id, f"Folder {n}", FOLDER_MIME, current))
+                    self.children[sub_id] = []
+                    stack.append((sub_id, remaining - 1))
+
+    @staticmethod
+    def _file(file_id, name, mime, parent):
+        item = {'id': file_id, 'name': name, 'mimeType': mime, 'parents': [parent], 'trashed': False}
+        if mime != FOLDER_MIME:
+            item['thumbnailLink'] = f"https://example.invalid/thumb/{file_id}=s220"
+            item['webContentLink'] = f"https://example.invalid/file/{file_id}"
+        return item
+
+    @property
+    def folder_count(self):
+        return len(self.children)
+
+    @property
+    def file_count(self):
+        return sum(1 for kids in self.children.values() for f in kids if f['mimeType'] != FOLDER_MIME)
+
+    # --- Mutators (recorded in the change feed) ---
+    def add_file(self, parent_id, name, mime='image/jpeg'):
+        item = self._file(self._new_id('f'), name, mime, parent_id)
+        self.children.setdefault(parent_id, []).append(item)
+        if mime == FOLDER_MIME:
+            self.children.setdefault(item['id'], [])
+        self.changes.append({'fileId': item['id'], 'removed': False, 'file': dict(item)})
+        return item
+
+    def remove_file(self, file_id):
+        for kids in self.children.values():
+            kids[:] = [f for f in kids if f['id'] != file_id]
+        self.children.pop(file_id, None)
+        self.changes.append({'fileId': file_id, 'removed': True})
+
+    # --- Service ---
+    def service(self):
+        """A client object; call once per thread, like googleapiclient.discovery.build."""
+        return FakeService(self)
+
+    def count_call(self):
+        with self._lock:
+            self.api_calls += 1
+
+    def rng_random(self):
+        with self._lock:
+            return self._rng.random()
+
+    def list_children(self, q, page_size, page_token):
+        parent = PARENT_RE.search(q)
+        if not parent:
+            raise ValueError(f"Unsupported query: {q}")
+        kids = self.children.get(parent.group(1), [])
+
+        name_match = NAME_RE.search(q)
+        if name_match:
+            needle = re.sub(r"\\(.)", r"\1", name_match.group(1)).lower()
+            kids = [f for f in kids if f['mimeType'] == FOLDER_MIME or needle in f['name'].lower()]
+
+        start = int(page_token or 0)
+        response = {'files': [dict(f) for f in kids[start:start + page_size]]}
+        if start + page_size < len(kids):
+            response['nextPageToken'] = str(start + page_size)
+        return response
+
+    def list_changes(self, page_token, page_size):
+        start = int(page_token)
+        response = {'changes': self.changes[start:start + page_size]}
+        if start + page_size < len(self.changes):
+            response['nextPageToken'] = str(start + page_size)
+        else:
+            response['newStartPageToken'] = str(len(self.changes))
+        return response
@@ -0,0 +1,126 @@
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+
+from inventory_journal import write_atomic
+from inventory_merge import apply_deltas
+
+DEFAULT_BRANCH = "main"
+
+# A push rejected because another register pushed first is re-merged and retried this often
+PUSH_ATTEMPTS = 3
+
+
+class GitSyncError(Exception):
+    pass
+
+
+def run_git(repo_path, *args):
+    """Runs one git command in repo_path. Returns stdout, raises GitSyncError with stderr on failure."""
+    result = subprocess.run(["git", *args], cwd=repo_path, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise GitSyncError(f"git {' '.join(args)} failed:\n{result.stderr or result.stdout}")
+    return result.stdout
+
+
+def pull(repo_path, branch=DEFAULT_BRANCH, progress=lambda msg: None):
+    """Makes the data repo match the remote branch exactly (fetch + hard reset)."""
+    progress("Fetching...")
+    run_git(repo_path, "fetch", "--all")
+    progress("Resetting to remote...")
+    return run_git(repo_path, "reset", "--hard", f"origin/{branch}")
+
+
+def push(repo_path, filename, branch=DEFAULT_BRANCH, message=None, progress=lambda msg: None):
+    """Commits filename (if it changed) and pushes it. Works the same on Windows and Linux."""
+    progress("Committing...")
+    run_git(repo_path, "add", "--", filename)
+    if not run_git(repo_path, "status", "--porcelain", "--", filename).strip():
+        return "Nothing to push: inventory unchanged."
+    message = message or f"Inventory update {time.strftime('%Y-%m-%d %H:%M:%S')}"
+    run_git(repo_path, "commit", "-m", message, "--", filename)
+    progress("Pushing...")
+    run_git(repo_path, "push", "origin", f"HEAD:{branch}")
+    return f"Pushed: {message}"
+
+
+def read_inventory(repo_path, filename):
+    """The inventory as checked out in the data repo, with upper-cased IDs."""
+    with open(os.path.join(repo_path, filename), 'r') as f:
+        return {k.upper(): v for k, v in json.load(f).items()}
+
+
+def pull_inventory(repo_path, filename, branch=DEFAULT_BRANCH, progress=lambda msg: None):
+    """Updates the data repo and returns the remote inventory."""
+    pull(repo_path, branch, progress)
+    return read_inventory(repo_path, filename)
+
+
+def push_deltas(repo_path, filename, deltas, branch=DEFAULT_BRANCH, progress=lambda msg: None):
+    """Applies this register's deltas on top of the latest remote inventory and pushes the result.
+
+    Returns (merged inventory, conflicts). Only counts that changed here
+    are touched, so sales pushed meanwhile by other registers are kept.
+    """
+    for attempt in range(1, PUSH_ATTEMPTS + 1):
+        remote = pull_inventory(repo_path, filename, branch, progress)
+        merged, conflicts = apply_deltas(remote, deltas)
+        write_atomic(os.path.join(repo_path, filename), json.dumps(merged, indent=4).encode())
+        try:
+            push(repo_path, filename, branch, f"Inventory update: {len(deltas)} item(s) changed", progress)
+            return merged, conflicts
+        except GitSyncError:
+            if attempt == PUSH_ATTEMPTS:
+                raise
+            # Most likely another register pushed first; merge onto their commit and try again
+            progress(f"Push rejected, retrying ({attempt}/{PUSH_ATTEMPTS})...")
+
+
+class GitSyncWorker:
+    """Runs git jobs one at a time on a background thread.
+
+    The UI posts jobs with request() and drains progress/results from
+    events, so the POS never waits on the network. A job kind that is
+    already waiting in the queue is not queued again, so hammering Push
+    results in a single push of the latest data.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.events = queue.Queue()     # (kind, state, payload, notify); state: queued/progress/done/error
+        self.waiting = set()
+        self.busy = None                # kind of the job currently running
+        self.lock = threading.Lock()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def request(self, kind, fn, notify=True):
+        """Queues fn(progress) under kind. Returns False if that kind was already waiting."""
+        with self.lock:
+            if kind in self.waiting:
+                return False
+            self.waiting.add(kind)
+        self.jobs.put((kind, fn, notify))
+        self.events.put((kind, "queued", None, notify))
+        return True
+
+    def run(self):
+        while True:
+            kind, fn, notify = self.jobs.get()
+            with self.lock:
+                # From here on a new request of this kind queues a fresh run
+                self.waiting.discard(kind)
+                self.busy = kind
+
+            def progress(msg):
+                self.events.put((kind, "progress", msg, notify))
+
+            try:
+                self.events.put((kind, "done", fn(progress), notify))
+            except Exception as e:
+                self.events.put((kind, "error", e, notify))
+            finally:
+                with self.lock:
+                    self.busy = None
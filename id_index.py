@@ -0,0 +1,126 @@
+from bisect import bisect_left
+
+
+def normalize_id(item_id):
+    """Item IDs are compared trimmed and upper-cased, like InventoryApp does."""
+    return str(item_id).strip().upper()
+
+
+def within_one_edit(a, b):
+    """True if a and b differ by at most one wrong, missing, extra or swapped (adjacent) character.
+
+    A single pass over the strings, instead of a full edit-distance table.
+    """
+    if a == b:
+        return True
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    # Skip the common prefix; whatever is left must be one edit
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return (a[i + 1:] == b[i + 1:]
+            or (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]))
+
+
+def one_edit_variants(word, alphabet):
+    """Every string one wrong, missing, extra or swapped character away from word (letters from alphabet)."""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    variants = {head + tail[1:] for head, tail in splits if tail}
+    variants.update(head + tail[1] + tail[0] + tail[2:] for head, tail in splits if len(tail) > 1)
+    variants.update(head + ch + tail[1:] for head, tail in splits if tail for ch in alphabet)
+    variants.update(head + ch + tail for head, tail in splits for ch in alphabet)
+    return variants
+
+
+def single_deletes(word):
+    """word plus every string made by dropping one character from it."""
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class IdIndex:
+    """Sorted item-ID list for prefix suggestions plus a one-delete neighbourhood map for typos.
+
+    Two IDs within one edit (wrong, missing, extra or swapped character)
+    always share a one-character deletion, so fuzzy lookups only need a few
+    dict hits instead of comparing against every ID.
+
+    over_sorted() builds a light index over IDs kept elsewhere instead: no
+    copies and no deletion map, at the cost of a membership test for every
+    one-edit variant of the query (a few hundred) in similar().
+    """
+
+    def __init__(self, ids):
+        self.originals = {}     # normalized ID -> ID as first seen, which is what suggestions show
+        for item_id in ids:
+            self.originals.setdefault(normalize_id(item_id), str(item_id).strip())
+        self.originals.pop("", None)
+        self.ids = sorted(self.originals)
+        self.deletes = {}   # deletion variant -> IDs that produce it
+        for item_id in self.ids:
+            for variant in single_deletes(item_id):
+                self.deletes.setdefault(variant, []).append(item_id)
+
+    @classmethod
+    def over_sorted(cls, ids, contains, alphabet):
+        """Index over ids that are already normalized, unique and sorted (any sequence), used in place.
+
+        contains(item_id) is a fast membership test for the same IDs, and
+        alphabet the characters they use.
+        """
+        index = cls.__new__(cls)
+        index.originals = None
+        index.ids = ids
+        index.deletes = None
+        index.contains = contains
+        index.alphabet = alphabet
+        return index
+
+    def original(self, item_id):
+        """item_id (normalized) as it should be shown."""
+        return item_id if self.originals is None else self.originals[item_id]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, item_id):
+        item_id = normalize_id(item_id)
+        pos = bisect_left(self.ids, item_id)
+        return pos < len(self.ids) and self.ids[pos] == item_id
+
+    def prefix(self, text, limit=8):
+        """Up to limit IDs starting with text, in sorted order."""
+        text = normalize_id(text)
+        if not text:
+            return []
+        pos = bisect_left(self.ids, text)
+        matches = []
+        while pos < len(self.ids) and len(matches) < limit and self.ids[pos].startswith(text):
+            matches.append(self.original(self.ids[pos]))
+            pos += 1
+        return matches
+
+    def similar(self, text, limit=5):
+        """IDs one edit away from text, best first (not including text itself)."""
+        text = normalize_id(text)
+        if self.deletes is None:
+            candidates = {c for c in one_edit_variants(text, self.alphabet) if self.contains(c)}
+        else:
+            candidates = set()
+            for variant in single_deletes(text):
+                candidates.update(self.deletes.get(variant, ()))
+            # Sharing a deletion doesn't make two IDs one edit apart ('AB' and 'BC' share 'B')
+            candidates = {c for c in candidates if within_one_edit(text, c)}
+        candidates.discard(text)
+        return [self.original(c) for c in sorted(candidates)][:limit]
+
+    def suggest(self, text, limit=8):
+        """Live suggestions while typing: prefix matches first, then near-misses."""
+        matches = self.prefix(text, limit)
+        if len(matches) < limit:
+            matches += [c for c in self.similar(text, limit) if c not in matches][:limit - len(matches)]
+        return matches
@@ -0,0 +1,74 @@
+import re
+
+# Pasted ID lists come one per line, or separated by spaces, commas, semicolons or tabs
+ID_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def parse_id_list(text):
+    """IDs from pasted text, in order, without blanks or repeats (repeats compared case-insensitively)."""
+    ids, seen = [], set()
+    for item_id in ID_SEPARATORS.split(text):
+        key = item_id.lower()
+        if item_id and key not in seen:
+            seen.add(key)
+            ids.append(item_id)
+    return ids
+
+
+class IdMatcher:
+    """Aho-Corasick automaton that finds every ID contained in a file name in one pass over the name.
+
+    Matching is case-insensitive substring matching, the same rule as a
+    single search, so 'K29' also matches 'K294.jpg'. The automaton is built
+    as a full transition table (each state maps every character it can
+    continue with), so matching never follows failure links.
+    """
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+        goto = [{}]
+        outputs = [set()]
+        for item_id in self.ids:
+            state = 0
+            for ch in item_id.lower():
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = goto[state][ch] = len(goto)
+                    goto.append({})
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(item_id)
+
+        # Breadth-first, so a state's failure target is finished before the state itself
+        fail = [0] * len(goto)
+        self.delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = list(goto[0].values())
+        for state in queue:
+            fallback = self.delta[fail[state]]
+            outputs[state] |= outputs[fail[state]]
+            self.delta[state] = dict(fallback, **goto[state]) if goto[state] else fallback
+            for ch, nxt in goto[state].items():
+                fail[nxt] = fallback.get(ch, 0)
+                queue.append(nxt)
+        self.outputs = [frozenset(out) for out in outputs]
+
+    def matches(self, name):
+        """Set of IDs that occur in name."""
+        found = set()
+        delta, outputs, state = self.delta, self.outputs, 0
+        for ch in name.lower():
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
+
+    def group(self, items, name=lambda item: item['name']):
+        """{id: [items whose name contains it]} for every ID, with exact-name matches listed first."""
+        groups = {item_id: [] for item_id in self.ids}
+        for item in items:
+            for item_id in self.matches(name(item)):
+                groups[item_id].append(item)
+        for item_id, matched in groups.items():
+            lowered = item_id.lower()
+            matched.sort(key=lambda item: name(item).rsplit('.', 1)[0].lower() != lowered)
+        return groups
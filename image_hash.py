@@ -0,0 +1,308 @@
+"""Perceptual-hash index for finding re-shot duplicates in an image folder.
+
+Every image gets a 64-bit difference hash (dHash): shrink to 9x8 greys and
+record whether each pixel is brighter than its right-hand neighbour.
+Re-saves, resizes and small exposure changes flip only a few bits, so the
+Hamming distance between two hashes says how alike the photos look.
+Hashes are cached next to the previews, keyed by path + mtime + size, so
+only new or edited photos are decoded again.
+
+    python image_hash.py /path/to/images --distance 4 --output duplicates.tsv
+    python image_hash.py /path/to/images --similar /path/to/images/K294.jpg
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import METRICS
+from preview_store import is_image_name, pick_cache_dir
+from reconcile import scan_tree
+
+HASH_SIZE = 8                       # 8x8 comparisons = 64-bit hashes
+HASH_CACHE_NAME = "hashes.json"     # kept in the same directory as the previews
+HASH_WORKERS = os.cpu_count() or 4  # Pillow releases the GIL while decoding
+
+# Default Hamming distances: up to this many differing bits counts as "similar" / "duplicate"
+SIMILAR_DISTANCE = 10
+DEDUP_DISTANCE = 4
+
+# Runs of rows sharing a block value longer than this are compared all-pairs instead of by
+# offset, PAIRWISE_CELLS distances at a time (about 32 MiB of uint64s)
+RUN_CAP = 64
+PAIRWISE_CELLS = 4 * 1024 * 1024
+
+
+def dhash(path):
+    from PIL import Image   # imported on first use so the apps start without waiting for Pillow
+
+    with Image.open(path) as img:
+        # Only a few dozen pixels are needed, so let JPEGs decode at 1/8 scale
+        img.draft("L", ((HASH_SIZE + 1) * 8, HASH_SIZE * 8))
+        img = img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX)
+    pixels = img.tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def popcount(values):
+    """Set bits per element of a uint64 array."""
+    import numpy as np
+
+    if hasattr(np, "bitwise_count"):   # NumPy 2.0+
+        return np.bitwise_count(values)
+    bytes_ = values.view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(bytes_, axis=1).sum(axis=1)
+
+
+def pairs_within(rows, hashes, max_distance):
+    """[a, b] row pairs among rows whose hashes are within max_distance, comparing every pair.
+
+    Rows with identical hashes are only paired with the first of them, so the
+    all-pairs part covers distinct hashes; it is chunked to bound memory.
+    """
+    import numpy as np
+
+    values, first, inverse = np.unique(hashes[rows], return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    same = rows != rows[first[inverse]]
+    pairs = [np.stack((rows[first[inverse]][same], rows[same]), axis=1)]
+    reps = rows[first]
+    chunk = max(1, PAIRWISE_CELLS // len(values))
+    for start in range(0, len(values), chunk):
+        distances = popcount(values[start:start + chunk, None] ^ values[None, start:])
+        a, b = np.nonzero(distances <= max_distance)
+        later = b > a   # b is counted from start too, so this keeps each pair once
+        pairs.append(np.stack((reps[start + a[later]], reps[start + b[later]]), axis=1))
+    return np.concatenate(pairs)
+
+
+class HashIndex:
+    """dHashes of every image in a folder, packed into one uint64 array for vectorized Hamming search."""
+
+    def __init__(self, folder, cache_dir=None):
+        self.folder = folder
+        self.cache_path = os.path.join(cache_dir or pick_cache_dir(folder), HASH_CACHE_NAME)
+        self.entries = {}       # path relative to folder -> (mtime_ns, size, hash)
+        self.paths = []         # row -> absolute path, aligned with self.hashes
+        self.hashes = None      # numpy uint64 array
+        self.positions = {}     # absolute path -> row
+        self.lock = threading.Lock()
+        # Progress of the current update
+        self.total = 0
+        self.done = 0
+        self.hashed = 0
+        self.running = False
+        self.load()
+
+    # --- Cache ---
+    def load(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                self.entries = {rel: tuple(entry) for rel, entry in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Hash Cache Error: {e}")
+
+    def save(self):
+        tmp_path = f"{self.cache_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, separators=(',', ':'))
+        os.replace(tmp_path, self.cache_path)
+
+    # --- Building ---
+    def update(self, paths, max_workers=HASH_WORKERS):
+        """Hashes new or changed images among paths and drops the rest. Meant for a background thread."""
+        import numpy as np
+
+        paths = [p for p in paths if is_image_name(p)]
+        self.total, self.done, self.hashed = len(paths), 0, 0
+        self.running = True
+        try:
+            with METRICS.timer("hash_update"):
+                entries, todo = {}, []
+                for path in paths:
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    rel = os.path.relpath(path, self.folder)
+                    cached = self.entries.get(rel)
+                    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                        entries[rel] = cached
+                        self.done += 1
+                    else:
+                        todo.append((rel, path, st.st_mtime_ns, st.st_size))
+
+                def work(job):
+                    rel, path, mtime, size = job
+                    try:
+                        return rel, (mtime, size, dhash(path))
+                    except Exception as e:
+                        print(f"Hash Error ({path}): {e}")
+                        return rel, None
+                    finally:
+                        self.done += 1
+
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    for rel, entry in executor.map(work, todo):
+                        if entry is not None:
+                            entries[rel] = entry
+                            self.hashed += 1
+
+                changed = entries.keys() != self.entries.keys() or self.hashed > 0
+                rels = sorted(entries)
+                hashes = np.fromiter((entries[rel][2] for rel in rels), dtype=np.uint64, count=len(rels))
+                with self.lock:
+                    self.entries = entries
+                    self.paths = [os.path.join(self.folder, rel) for rel in rels]
+                    self.positions = {path: i for i, path in enumerate(self.paths)}
+                    self.hashes = hashes
+            if changed:
+                try:
+                    self.save()
+                except OSError as e:
+                    print(f"Hash Cache Error: {e}")
+        finally:
+            self.running = False
+
+    # --- Queries ---
+    def hash_of(self, path):
+        with self.lock:
+            row = self.positions.get(path)
+            if row is not None:
+                return int(self.hashes[row])
+        return dhash(path)
+
+    def similar(self, path, max_distance=SIMILAR_DISTANCE):
+        """[(distance, path)] of the other images within max_distance of path, closest first."""
+        import numpy as np
+
+        query = np.uint64(self.hash_of(path))
+        with self.lock:
+            paths, hashes = self.paths, self.hashes
+        if hashes is None:
+            return []
+        with METRICS.timer("similar_search"):
+            distances = popcount(hashes ^ query)
+            rows = np.flatnonzero(distances <= max_distance)
+            rows = rows[np.argsort(distances[rows], kind="stable")]
+        return [(int(distances[row]), paths[row]) for row in rows if paths[row] != path]
+
+    def duplicate_groups(self, max_distance=DEDUP_DISTANCE):
+        """Groups of paths whose images are within max_distance of another in the group, largest first.
+
+        Splits the hash into max_distance + 1 bit blocks: two hashes that differ
+        in at most max_distance bits must agree exactly on at least one block, so
+        only rows sharing a block value are compared instead of every pair.
+        Rows in short runs of one value are compared by offset within the
+        run; the rare long runs (e.g. many near-blank frames) go through
+        pairs_within, so a skewed folder costs distinct hashes squared in
+        vectorized chunks rather than a Python loop per offset.
+        """
+        import numpy as np
+
+        with self.lock:
+            paths, hashes = self.paths, self.hashes
+        if hashes is None or len(hashes) < 2:
+            return []
+
+        bits = HASH_SIZE * HASH_SIZE
+        blocks = min(max_distance + 1, bits)
+        bounds = [bits * i // blocks for i in range(blocks + 1)]
+        pairs = []
+        for low, high in zip(bounds, bounds[1:]):
+            mask = np.uint64((1 << (high - low)) - 1)
+            keys = (hashes >> np.uint64(low)) & mask
+            order = np.argsort(keys, kind="stable")
+            keys = keys[order]
+            run_starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            run_lengths = np.diff(np.r_[run_starts, len(keys)])
+            in_long_run = np.repeat(run_lengths > RUN_CAP, run_lengths)
+            # Rows k apart in sorted order with the same key share the block; stop once no short run is that long
+            for k in range(1, RUN_CAP):
+                same = np.flatnonzero((keys[:-k] == keys[k:]) & ~in_long_run[k:])
+                if not len(same):
+                    break
+                a, b = order[same], order[same + k]
+                close = popcount(hashes[a] ^ hashes[b]) <= max_distance
+                pairs.append(np.stack((a[close], b[close]), axis=1))
+            for start, length in zip(run_starts[run_lengths > RUN_CAP], run_lengths[run_lengths > RUN_CAP]):
+                pairs.append(pairs_within(order[start:start + length], hashes, max_distance))
+        if not pairs:
+            return []
+
+        parent = {}
+
+        def find(row):
+            while parent.get(row, row) != row:
+                parent[row] = parent.get(parent[row], parent[row])
+                row = parent[row]
+            return row
+
+        members = set()
+        for a, b in np.concatenate(pairs).tolist():
+            members.update((a, b))
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        groups = {}
+        for row in members:
+            groups.setdefault(find(row), []).append(row)
+        groups = [sorted(paths[row] for row in rows) for rows in groups.values()]
+        groups.sort(key=lambda group: (-len(group), group[0]))
+        return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate images by perceptual hash.")
+    parser.add_argument("images_folder")
+    parser.add_argument("--distance", type=int, help=f"max differing bits (default {DEDUP_DISTANCE}, "
+                                                     f"or {SIMILAR_DISTANCE} with --similar)")
+    parser.add_argument("--similar", metavar="IMAGE", help="list the images that look like this one")
+    parser.add_argument("--workers", type=int, default=HASH_WORKERS)
+    parser.add_argument("--output", help="write the duplicate report here as TSV")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    folder = os.path.abspath(args.images_folder)
+    paths = [os.path.join(dirpath, name) for name, dirs in scan_tree(folder).items() for dirpath in dirs]
+    index = HashIndex(folder)
+    index.update(paths, args.workers)
+    hashed = time.perf_counter()
+    print(f"{len(index.paths):,} images ({index.hashed:,} hashed, {len(index.paths) - index.hashed:,} cached) "
+          f"in {hashed - started:.2f}s")
+
+    if args.similar:
+        matches = index.similar(os.path.abspath(args.similar),
+                                SIMILAR_DISTANCE if args.distance is None else args.distance)
+        print(f"Searched in {(time.perf_counter() - hashed) * 1000:.1f} ms")
+        for distance, path in matches:
+            print(f"{distance:>3}  {path}")
+        return
+
+    groups = index.duplicate_groups(DEDUP_DISTANCE if args.distance is None else args.distance)
+    print(f"{len(groups):,} duplicate groups ({sum(map(len, groups)):,} images) "
+          f"found in {time.perf_counter() - hashed:.2f}s")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write("Group\tItem ID\tPath\n")
+            for number, group in enumerate(groups, 1):
+                for path in group:
+                    f.write(f"{number}\t{os.path.splitext(os.path.basename(path))[0]}\t{path}\n")
+        print(f"Report written to {args.output}")
+    else:
+        for number, group in enumerate(groups, 1):
+            print(f"{number}: " + "  ".join(group))
+
+
+if __name__ == "__main__":
+    main()
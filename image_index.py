@@ -0,0 +1,186 @@
+import os
+import threading
+
+from metrics import METRICS
+
+# Same candidates, in the same order, as ImageSearchApp.find_file
+IMAGE_EXTENSIONS = ['', '.jpg', '.jpeg', '.png', '.gif', '.bmp']
+
+# Generated content inside the image folder that is not part of the catalog (see preview_store.py)
+SKIP_DIR_NAMES = {'.previews'}
+
+
+def scan_dir(dirpath):
+    """(mtime_ns, file names, subdir paths) for one directory, or None if it is gone."""
+    try:
+        # Stat before listing so a change made mid-listing still shows up on the next refresh
+        mtime = os.stat(dirpath).st_mtime_ns
+        names, subdirs = set(), set()
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIR_NAMES:
+                        subdirs.add(entry.path)
+                else:
+                    names.add(entry.name)
+        return mtime, names, subdirs
+    except OSError:
+        return None
+
+
+class ImageIndex:
+    """Filename -> path index of an image folder tree.
+
+    Built once in the background, then kept current by rescanning only the
+    directories whose mtime changed (adding, removing or renaming a file
+    bumps its directory's mtime, which also works on network shares where
+    inotify does not). Lookups are dict hits, with a case-insensitive
+    fallback.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.dirs = {}          # dir path -> (mtime_ns, set of file names, set of subdir paths)
+        self.locations = {}     # file name -> [dir paths], in scan order
+        self.by_lower = {}      # lowercased file name -> [file names]
+        self.ready = False
+        self.scanned_dirs = 0
+        self.scanned_files = 0
+        self.error = None
+        self.lock = threading.Lock()
+
+    @property
+    def entry_count(self):
+        return len(self.locations)
+
+    # --- Building ---
+    def build(self):
+        """Walks the whole tree. Meant to run on a background thread."""
+        try:
+            dirs, locations, by_lower = {}, {}, {}
+            with METRICS.timer("index_build"):
+                self._scan_tree(self.folder, dirs, locations, by_lower)
+            with self.lock:
+                self.dirs, self.locations, self.by_lower = dirs, locations, by_lower
+                self.ready = True
+        except Exception as e:
+            self.error = e
+
+    def _scan_tree(self, top, dirs, locations, by_lower):
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            scanned = scan_dir(dirpath)
+            if scanned is None:
+                continue
+            mtime, names, subdirs = scanned
+            dirs[dirpath] = scanned
+            for name in names:
+                self._add(name, dirpath, locations, by_lower)
+            # Reversed so directories are visited in listing order, like os.walk
+            stack.extend(sorted(subdirs, reverse=True))
+            self.scanned_dirs += 1
+            self.scanned_files += len(names)
+
+    @staticmethod
+    def _add(name, dirpath, locations, by_lower):
+        locations.setdefault(name, []).append(dirpath)
+        lowered = by_lower.setdefault(name.lower(), [])
+        if name not in lowered:
+            lowered.append(name)
+
+    def _remove(self, name, dirpath):
+        paths = self.locations.get(name)
+        if not paths or dirpath not in paths:
+            return
+        paths.remove(dirpath)
+        if not paths:
+            del self.locations[name]
+            lowered = self.by_lower.get(name.lower(), [])
+            if name in lowered:
+                lowered.remove(name)
+            if not lowered:
+                self.by_lower.pop(name.lower(), None)
+
+    def _drop_dir(self, dirpath):
+        """Forgets a directory and everything below it."""
+        stack = [dirpath]
+        while stack:
+            current = stack.pop()
+            entry = self.dirs.pop(current, None)
+            if entry is None:
+                continue
+            _, names, subdirs = entry
+            for name in names:
+                self._remove(name, current)
+            stack.extend(subdirs)
+
+    # --- Incremental updates ---
+    def refresh(self):
+        """Rescans directories whose mtime changed. Returns how many were rescanned."""
+        if not self.ready:
+            return 0
+        with self.lock:
+            known = [(path, entry[0]) for path, entry in self.dirs.items()]
+
+        rescanned = 0
+        for dirpath, old_mtime in known:
+            try:
+                if os.stat(dirpath).st_mtime_ns == old_mtime:
+                    continue
+            except OSError:
+                pass  # gone; scan_dir below returns None and the dir is dropped
+
+            scanned = scan_dir(dirpath)
+            with self.lock:
+                old = self.dirs.get(dirpath)
+                if old is None:
+                    continue  # already dropped along with a parent
+                if scanned is None:
+                    self._drop_dir(dirpath)
+                    rescanned += 1
+                    continue
+
+                _, old_names, old_subdirs = old
+                mtime, names, subdirs = scanned
+                for name in old_names - names:
+                    self._remove(name, dirpath)
+                for name in names - old_names:
+                    self._add(name, dirpath, self.locations, self.by_lower)
+                for subdir in old_subdirs - subdirs:
+                    self._drop_dir(subdir)
+                self.dirs[dirpath] = scanned
+
+                for subdir in subdirs - old_subdirs:
+                    self._scan_tree(subdir, self.dirs, self.locations, self.by_lower)
+            rescanned += 1
+        return rescanned
+
+    def paths(self):
+        """Snapshot of every indexed file path."""
+        with self.lock:
+            return [os.path.join(dirpath, name) for dirpath, entry in self.dirs.items() for name in entry[1]]
+
+    def item_ids(self):
+        """Item IDs that have a photo: image file names without their extension."""
+        image_exts = set(IMAGE_EXTENSIONS[1:])
+        with self.lock:
+            names = list(self.locations)
+        return {stem for stem, ext in map(os.path.splitext, names) if ext.lower() in image_exts}
+
+    # --- Lookups ---
+    def lookup(self, filename):
+        """Path for filename (trying each image extension), exact case first, or None."""
+        with self.lock:
+            for ext in IMAGE_EXTENSIONS:
+                target = filename + ext
+                paths = self.locations.get(target)
+                if paths:
+                    return os.path.join(paths[0], target)
+
+            lowered = filename.lower()
+            for ext in IMAGE_EXTENSIONS:
+                names = self.by_lower.get(lowered + ext)
+                if names:
+                    return os.path.join(self.locations[names[0]][0], names[0])
+        return None
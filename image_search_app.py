@@ -1,14 +1,139 @@
+from startup_timer import StartupTimer, warm_imports
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
 import os
 import json  # Added for JSON parsing
+import threading
+import time
+import queue
+import sqlite3
+from bisect import bisect_left
+from collections import OrderedDict
+from id_index import IdIndex, normalize_id
+from image_hash import HashIndex
+from image_index import IMAGE_EXTENSIONS, ImageIndex
+from inventory_store import InventoryStore, is_store_path
+from metrics import METRICS
+from metrics_overlay import MetricsOverlay
+from preview_store import PreviewStore, load_scaled
+from reconcile import reconcile, scan_tree, summary, write_report
+from tk_tasks import run_in_background
+
+STARTUP = StartupTimer()
+STARTUP.mark("imports")
+
+# How often the image folder index checks for added/removed files
+INDEX_RESCAN_MS = 30000
+
+# How often the inventory file is checked for external edits
+INVENTORY_CHECK_MS = 2000
+
+# Size of the image display area
+DISPLAY_WIDTH, DISPLAY_HEIGHT = 750, 550
+
+# Memory allowed for already-rendered images (about 40 full-size previews)
+RENDER_CACHE_BYTES = 64 * 1024 * 1024
+
+# How often the Tk loop collects finished lookups from the search worker
+RESULT_POLL_MS = 20
+
+# Neighbouring item IDs (in sorted order) to warm up after each lookup
+PREFETCH_AHEAD, PREFETCH_BEHIND = 2, 1
+
+# Number of live item-ID suggestions shown under the search bar
+SUGGESTION_COUNT = 6
+
+def file_signature(path):
+    """Cheap change check: (mtime, size, inode), or None if the file is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def inventory_signature(path, store=None):
+    """file_signature() for a JSON inventory; for a store, its inode and PRAGMA data_version.
+
+    A WAL-mode store commits into its -wal file, so the database file's own
+    mtime says little; data_version changes with every commit made elsewhere.
+    """
+    signature = file_signature(path)
+    if store is None or signature is None:
+        return signature
+    return (signature[2], store.data_version())
+
+class RenderedImageCache:
+    """LRU of ready-to-show PhotoImages, keyed by path + file signature, within a memory budget."""
+
+    def __init__(self, max_bytes=RENDER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()   # (path, signature) -> (photo, bytes)
+        self.total_bytes = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, photo):
+        size = photo.width() * photo.height() * 4
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (photo, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, old_size) = self.entries.popitem(last=False)
+            self.total_bytes -= old_size
+
+class SearchWorker:
+    """Runs lookups on a background thread so the Tk loop never waits on disk.
+
+    Every submit() supersedes the requests before it: jobs that are still
+    queued are skipped, and a running job can poll is_stale() to give up
+    early. Results are handed back through a queue that the Tk loop drains.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler          # fn(job, is_stale) -> result dict
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.latest = 0
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, **job):
+        self.latest += 1
+        job['id'] = self.latest
+        self.jobs.put(job)
+        return job['id']
+
+    def prefetch(self, parent_id, **job):
+        """Low-priority work tied to a request; dropped once anything newer arrives."""
+        job['id'] = parent_id
+        job['prefetch'] = True
+        self.jobs.put(job)
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            is_stale = lambda: job['id'] != self.latest
+            if is_stale():
+                continue
+            try:
+                result = self.handler(job, is_stale)
+            except Exception as e:
+                result = {'error': e}
+            if result is not None:
+                result['job'] = job
+                self.results.put(result)
 
 class ImageSearchApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Image Search Tool + Inventory")
         self.root.geometry("800x850") # Increased height for inventory info
+        STARTUP.watch(root)
 
         # --- Variables ---
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,12 +143,30 @@ class ImageSearchApp:
         
         self.search_folder = tk.StringVar()
         self.inventory_path = tk.StringVar(value=default_json_inventory)
-        self.inventory_data = {}
+        self.inventory_data = {}          # JSON: item ID -> qty; store: just the IDs (quantities are read per scan)
+        self.inventory_signature = None   # file_signature() of the data currently in inventory_data
+        self.inventory_loaded_at = None
+        self.inventory_loader = None      # background reload in progress, if any
+        self.inventory_store = None       # InventoryStore, kept open while a store is the inventory
+        self.current_item_id = None
+        self.current_path = None          # file of the image on screen, for "Find similar"
+        self.image_index = None
+        self.preview_store = None
+        self.hash_index = None            # perceptual hashes, built on the first "Find similar"
+        self.hashes_stale = True          # the folder changed since the hashes were last updated
+        self.render_cache = RenderedImageCache()
+        self.id_index = None              # IdIndex over inventory keys + photo names, for suggestions
+        self.id_index_generation = 0
+        self.sorted_ids = ([], None)      # (sorted inventory keys, inventory dict they came from)
+        self.search_worker = SearchWorker(self.run_lookup)
+        self.root.after(RESULT_POLL_MS, self.poll_results)
         
         if os.path.exists(default_json_inventory):
+            STARTUP.expected.append("inventory loaded")
             self.load_inventory()
         else:
             print("Warning: Default inventory JSON not found on startup.")
+        self.root.after(INVENTORY_CHECK_MS, self.watch_inventory)
 
         # --- UI Layout ---
         # 1. Folder & File Selection Section
@@ -36,10 +179,20 @@ class ImageSearchApp:
         tk.Button(selection_frame, text="Browse...", command=self.browse_folder).grid(row=0, column=2)
 
         # Inventory JSON Row
-        tk.Label(selection_frame, text="Inventory JSON:").grid(row=1, column=0, sticky="w", pady=5)
+        tk.Label(selection_frame, text="Inventory (JSON/DB):").grid(row=1, column=0, sticky="w", pady=5)
         tk.Entry(selection_frame, textvariable=self.inventory_path, width=50).grid(row=1, column=1, padx=5)
         tk.Button(selection_frame, text="Browse...", command=self.browse_inventory).grid(row=1, column=2)
 
+        # Image index status (build progress / entry count)
+        self.lbl_index_status = tk.Label(selection_frame, text="", fg="gray40")
+        self.lbl_index_status.grid(row=2, column=1, sticky="w", padx=5)
+        self.btn_reconcile = tk.Button(selection_frame, text="Reconcile...", command=self.reconcile_folder)
+        self.btn_reconcile.grid(row=2, column=2)
+
+        # When the inventory data was last (re)loaded
+        self.lbl_inventory_status = tk.Label(selection_frame, text="", fg="gray40")
+        self.lbl_inventory_status.grid(row=3, column=1, sticky="w", padx=5)
+
         # 2. Search Bar Section
         search_frame = tk.Frame(root, pady=10)
         search_frame.pack(fill="x", padx=10)
@@ -52,6 +205,19 @@ class ImageSearchApp:
 
         btn_search = tk.Button(search_frame, text="Search", command=self.perform_search, font=("Arial", 10), height=2)
         btn_search.pack(side="left")
+        self.btn_similar = tk.Button(search_frame, text="Find similar", command=self.find_similar,
+                                     font=("Arial", 10), height=2, state="disabled")
+        self.btn_similar.pack(side="left", padx=5)
+        self.search_entry.bind('<KeyRelease>', self.update_suggestions)
+
+        # Live item-ID suggestions (click one to search it)
+        suggestion_frame = tk.Frame(root)
+        suggestion_frame.pack(fill="x", padx=10)
+        self.suggestion_buttons = []
+        for _ in range(SUGGESTION_COUNT):
+            btn = tk.Button(suggestion_frame, text="", relief="flat", fg="gray25", font=("Arial", 10))
+            btn.config(command=lambda b=btn: self.pick_suggestion(b.cget("text")))
+            self.suggestion_buttons.append(btn)
 
         # 3. Inventory Result Text
         # This is where "K294 - Qty: 4" will appear
@@ -59,31 +225,313 @@ class ImageSearchApp:
         self.lbl_inventory_info.pack(pady=5)
 
         # 4. Image Display Area
-        self.display_frame = tk.Frame(root, bg="gray90", width=750, height=550)
+        self.display_frame = tk.Frame(root, bg="gray90", width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT)
         self.display_frame.pack_propagate(False)
         self.display_frame.pack(pady=10)
 
         self.lbl_image = tk.Label(self.display_frame, text="No image displayed", bg="gray90")
         self.lbl_image.pack(expand=True)
 
+        # 5. Debug status line (decode timings, render cache usage)
+        self.lbl_debug = tk.Label(root, text="", font=("Courier", 9), fg="gray50")
+        self.lbl_debug.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
+
+        # F12: live stage timings and counters
+        self.metrics_overlay = MetricsOverlay(root)
+
+        # Pillow is only needed once an image is shown; load it after the window is up
+        STARTUP.report_callbacks.append(lambda summary: self.lbl_debug.config(text=f"Startup: {summary}"))
+        STARTUP.when_painted(lambda: warm_imports("PIL.Image", "PIL.ImageTk"))
+
     def browse_folder(self):
         folder_selected = filedialog.askdirectory()
         if folder_selected:
             self.search_folder.set(folder_selected)
+            self.start_indexing(folder_selected)
+
+    def start_indexing(self, folder):
+        """Builds the filename index for folder on a background thread."""
+        if self.preview_store is not None:
+            self.preview_store.cancelled = True
+        self.image_index = ImageIndex(folder)
+        self.preview_store = PreviewStore(folder, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+        threading.Thread(target=self.image_index.build, daemon=True).start()
+        self.poll_index(self.image_index, changed=True)
+
+    def poll_index(self, index, changed=False):
+        # A newer folder was chosen; let the old index go
+        if index is not self.image_index:
+            return
+        if index.error:
+            self.lbl_index_status.config(text=f"Index failed: {index.error}", fg="red")
+        elif index.ready:
+            if changed:
+                self.hashes_stale = True
+                self.start_previews()
+                self.rebuild_id_index()
+            self.show_index_status()
+            self.root.after(INDEX_RESCAN_MS, self.rescan_index, index)
+        else:
+            self.lbl_index_status.config(text=f"Indexing... {index.scanned_files:,} files in {index.scanned_dirs:,} folders", fg="gray40")
+            self.root.after(200, self.poll_index, index, changed)
+
+    def show_index_status(self):
+        text = f"Indexed {self.image_index.entry_count:,} files"
+        store = self.preview_store
+        if store.running:
+            text += f" · previews {store.done:,}/{store.total:,}"
+        self.lbl_index_status.config(text=text, fg="gray40")
+
+    def start_previews(self):
+        """Pre-generates display-sized previews for the whole folder in the background."""
+        store = self.preview_store
+        if store.running:
+            return
+        store.running = True  # so the status shows progress straight away
+        threading.Thread(target=store.pregenerate, args=(self.image_index.paths(),), daemon=True).start()
+        self.poll_previews(store)
+
+    def poll_previews(self, store):
+        if store is not self.preview_store:
+            return
+        self.show_index_status()
+        if store.running:
+            self.root.after(500, self.poll_previews, store)
+
+    def rescan_index(self, index):
+        """Picks up added/removed files by rescanning changed directories, off the UI thread."""
+        if index is not self.image_index:
+            return
+
+        run_in_background(self.root, index.refresh,
+                          lambda changed, error: self.finish_rescan(index, changed, error), poll_ms=200)
+
+    def finish_rescan(self, index, changed, error):
+        if error is not None:
+            print(f"Rescan Error: {error}")
+        # New or replaced photos get their previews made now rather than on first lookup
+        self.poll_index(index, changed=bool(changed))
+
+    # --- Similar images ---
+    def find_similar(self):
+        """Lists photos that look like the one on screen, e.g. re-shots filed under another item ID."""
+        path, index = self.current_path, self.image_index
+        if path is None or index is None or not index.ready:
+            messagebox.showinfo("Find similar", "Wait for the image folder to finish indexing.")
+            return
+        hash_index = self.hash_index
+        if hash_index is None or hash_index.folder != index.folder:
+            hash_index = self.hash_index = HashIndex(index.folder, self.preview_store.preview_dir)
+            self.hashes_stale = True
+        # Only new or edited photos are decoded; the rest come from the hash cache
+        paths = index.paths() if self.hashes_stale else None
+        self.hashes_stale = False
+
+        def work():
+            if paths is not None:
+                hash_index.update(paths)
+            return hash_index.similar(path)
+
+        def show_progress():
+            if hash_index.running:
+                self.lbl_debug.config(text=f"Hashing images... {hash_index.done:,}/{hash_index.total:,}")
+
+        self.btn_similar.config(state="disabled")
+        run_in_background(self.root, work, lambda matches, error: self.finish_similar(path, matches, error),
+                          poll_ms=200, while_running=show_progress)
+
+    def finish_similar(self, path, matches, error):
+        self.btn_similar.config(state="normal" if self.current_path else "disabled")
+        if error is not None:
+            self.hashes_stale = True
+            messagebox.showerror("Error", f"Find similar failed: {error}")
+            return
+        self.show_similar(path, matches)
+
+    def show_similar(self, path, matches):
+        window = tk.Toplevel(self.root)
+        window.title(f"Similar to {os.path.basename(path)}")
+        if not matches:
+            tk.Label(window, text="No similar images found.").pack(padx=20, pady=20)
+            return
+
+        listbox = tk.Listbox(window, width=80, height=min(len(matches), 20), font=("Courier", 10))
+        for distance, match in matches:
+            listbox.insert(tk.END, f"{distance:>2}  {os.path.relpath(match, self.hash_index.folder)}")
+        listbox.pack(fill="both", expand=True, padx=10, pady=(10, 0))
+        listbox.bind("<Double-Button-1>", lambda event: self.show_match(matches, listbox.curselection()))
+        tk.Label(window, text="Differing hash bits, 0 = identical. Double-click to look up that item.",
+                 fg="gray40").pack(padx=10, pady=5)
+
+    def show_match(self, matches, selection):
+        if selection:
+            item_id = os.path.splitext(os.path.basename(matches[selection[0]][1]))[0]
+            self.search_entry.delete(0, tk.END)
+            self.search_entry.insert(0, item_id)
+            self.perform_search()
+
+    # --- Reconciliation ---
+    def reconcile_folder(self):
+        """Missing / orphan / duplicate report for the image folder vs the inventory, built off the UI thread."""
+        folder = self.search_folder.get()
+        if not folder or not os.path.isdir(folder):
+            messagebox.showerror("Error", "Please select a valid image folder.")
+            return
+        index = self.image_index
+        item_ids = list(self.inventory_data)
+
+        def work():
+            with METRICS.timer("reconcile"):
+                if index is not None and index.folder == folder and index.ready:
+                    # The index already holds the listing; no need to walk the tree again
+                    with index.lock:
+                        locations = {name: sorted(dirs) for name, dirs in index.locations.items()}
+                else:
+                    locations = scan_tree(folder)
+                return reconcile(locations, item_ids)
+
+        self.btn_reconcile.config(state="disabled", text="Reconciling...")
+        run_in_background(self.root, work, self.finish_reconcile)
+
+    def finish_reconcile(self, report, error):
+        self.btn_reconcile.config(state="normal", text="Reconcile...")
+        if error is not None:
+            messagebox.showerror("Error", f"Reconciliation failed: {error}")
+            return
+
+        if not messagebox.askyesno("Reconciliation", f"{summary(report)}\n\nSave the full report?"):
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".tsv", filetypes=[("TSV files", "*.tsv")])
+        if path:
+            try:
+                write_report(report, path)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save report: {e}")
 
     def browse_inventory(self):
-        file_selected = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+        file_selected = filedialog.askopenfilename(filetypes=[("JSON files", "*.json"), ("Inventory store", "*.db *.sqlite *.sqlite3")])
         if file_selected:
             self.inventory_path.set(file_selected)
-            self.load_inventory()
+            self.load_inventory(force=True)
 
-    def load_inventory(self):
-        """Loads or reloads the JSON data."""
+    def load_inventory(self, force=False):
+        """Reloads the JSON data (or store) in the background, but only if it changed since the last load."""
+        path = self.inventory_path.get()
+        store = None
         try:
-            with open(self.inventory_path.get(), 'r') as f:
-                self.inventory_data = json.load(f)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load JSON: {e}")
+            if is_store_path(path) and os.path.exists(path):
+                store = self.open_store(path)
+            signature = inventory_signature(path, store)
+        except sqlite3.Error as e:
+            print(f"Inventory Store Error: {e}")
+            return
+        if not force and (signature is None or signature == self.inventory_signature):
+            return
+        if self.inventory_loader is not None and self.inventory_loader.is_alive():
+            return  # the next check picks up anything newer
+
+        def work():
+            with METRICS.timer("json_load"):
+                if store is not None:
+                    # Every sale bumps data_version; only the ID list is worth re-reading
+                    return store.ids()
+                with open(path, 'r') as f:
+                    return json.load(f)
+
+        self.inventory_loader = run_in_background(
+            self.root, work, lambda data, error: self.finish_inventory(signature, data, error), poll_ms=50)
+
+    def open_store(self, path):
+        """The app's one InventoryStore, reopened only when a different database is picked."""
+        if self.inventory_store is None or self.inventory_store.path != path:
+            self.inventory_store = InventoryStore(path)
+        return self.inventory_store
+
+    def finish_inventory(self, signature, data, error):
+        if error is not None:
+            # Keep the signature so the watcher doesn't retry (and re-report) until the file changes again
+            self.inventory_signature = signature
+            STARTUP.mark("inventory loaded", note="failed")
+            self.lbl_inventory_status.config(text=f"Inventory failed to load: {error}", fg="red")
+            messagebox.showerror("Error", f"Failed to load JSON: {error}")
+            return
+        keys_changed = set(data) != set(self.inventory_data)
+        # Swap in the whole dict at once; lookups never see a half-loaded inventory
+        self.inventory_data = data
+        self.inventory_signature = signature
+        self.inventory_loaded_at = time.time()
+
+        STARTUP.mark("inventory loaded")
+        loaded_at = time.strftime("%H:%M:%S", time.localtime(self.inventory_loaded_at))
+        self.lbl_inventory_status.config(text=f"Inventory: {len(self.inventory_data):,} items · refreshed {loaded_at}", fg="gray40")
+        if keys_changed:
+            self.rebuild_id_index()
+        # The item on screen may have a new quantity
+        if self.current_item_id:
+            self.show_quantity(self.current_item_id)
+
+    def watch_inventory(self):
+        """Picks up external edits to the inventory file without waiting for the next scan."""
+        if self.inventory_path.get():
+            self.load_inventory()
+        self.root.after(INVENTORY_CHECK_MS, self.watch_inventory)
+
+    def show_quantity(self, item_id):
+        store = self.inventory_store
+        if store is not None and store.path == self.inventory_path.get():
+            # Straight from the store, so the count is current even between reloads
+            try:
+                qty = store.get(item_id)
+            except sqlite3.Error as e:
+                print(f"Inventory Store Error: {e}")
+                qty = None
+        else:
+            # JSON files keep whatever casing they were written with
+            key = item_id if item_id in self.inventory_data else normalize_id(item_id)
+            qty = self.inventory_data.get(key)
+        text = f"{item_id} - Qty: {'N/A' if qty is None else qty}"
+        if qty is None:
+            text += self.did_you_mean(item_id)
+        self.lbl_inventory_info.config(text=text)
+
+    # --- Item-ID suggestions ---
+    def rebuild_id_index(self):
+        """Rebuilds the suggestion index off the UI thread; the newest rebuild wins."""
+        self.id_index_generation += 1
+        generation = self.id_index_generation
+        ids = list(self.inventory_data)
+        index = self.image_index
+        if index is not None and index.ready:
+            ids.extend(index.item_ids())
+
+        def work():
+            id_index = IdIndex(ids)
+            if generation == self.id_index_generation:
+                self.id_index = id_index
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def update_suggestions(self, event=None):
+        text = self.search_entry.get().strip()
+        matches = self.id_index.suggest(text, SUGGESTION_COUNT) if self.id_index and text else []
+        for btn, match in zip(self.suggestion_buttons, matches + [None] * SUGGESTION_COUNT):
+            if match:
+                btn.config(text=match)
+                btn.pack(side="left", padx=2)
+            else:
+                btn.pack_forget()
+
+    def pick_suggestion(self, item_id):
+        self.search_entry.delete(0, tk.END)
+        self.search_entry.insert(0, item_id)
+        self.perform_search()
+
+    def did_you_mean(self, item_id):
+        """' (did you mean X?)' for a near-miss, or '' if nothing is close."""
+        if self.id_index is None:
+            return ""
+        close = self.id_index.similar(item_id, 3)
+        return f" (did you mean {' / '.join(close)}?)" if close else ""
 
     def perform_search(self, event=None):
         folder = self.search_folder.get()
@@ -91,6 +539,7 @@ class ImageSearchApp:
 
         # Clear search bar immediately
         self.search_entry.delete(0, tk.END)
+        self.update_suggestions()
 
         if not folder:
             messagebox.showwarning("Warning", "Please select an image folder first.")
@@ -100,59 +549,145 @@ class ImageSearchApp:
             return
 
         # 1. Update Inventory Text
-        # We reload the inventory here in case the JSON file was edited externally
+        # Reload only if the JSON file was edited externally since the last load
         if self.inventory_path.get():
             self.load_inventory()
             
-        qty = self.inventory_data.get(item_id, "N/A")
-        self.lbl_inventory_info.config(text=f"{item_id} - Qty: {qty}")
+        self.current_item_id = item_id
+        self.show_quantity(item_id)
 
-        # 2. Attempt to find and display the image
-        found_path = self.find_file(folder, item_id)
+        index = self.image_index
+        if index is None or index.folder != folder:
+            # Folder was typed in rather than browsed to; index it for next time
+            self.start_indexing(folder)
 
-        if found_path:
-            self.display_image(found_path)
-            self.search_entry.focus() 
-        else:
-            messagebox.showinfo("Not Found", f"Could not find image for '{item_id}'.")
-            self.clear_image()
+        # 2. Find and decode the image in the background; a newer scan supersedes this one
+        self.search_worker.submit(folder=folder, item_id=item_id, started=time.perf_counter())
+        self.search_entry.focus()
+
+    def run_lookup(self, job, is_stale):
+        """Worker thread: locates and decodes the image for a job. Must not touch Tk."""
+        with METRICS.timer("file_search"):
+            path = self.find_file(job['folder'], job['item_id'], is_stale)
+        if is_stale():
+            return None
+        if path is None:
+            return {'path': None}
 
-    def find_file(self, folder, filename):
-        extensions = ['', '.jpg', '.jpeg', '.png', '.gif', '.bmp']
+        key = (path, file_signature(path))
+        result = {'path': path, 'key': key, 'image': None}
+        if key not in self.render_cache.entries:
+            with METRICS.timer("decode"):
+                result['image'], result['detail'] = self.decode_image(path)
+
+        if not job.get('prefetch'):
+            for neighbour in self.neighbour_ids(job['item_id']):
+                self.search_worker.prefetch(job['id'], folder=job['folder'], item_id=neighbour)
+        return result
+
+    def neighbour_ids(self, item_id):
+        """The IDs either side of item_id in sorted order, the likeliest next scans."""
+        ids, source = self.sorted_ids
+        if source is not self.inventory_data:
+            source = self.inventory_data
+            ids = sorted(source)
+            self.sorted_ids = (ids, source)
+        pos = bisect_left(ids, item_id)
+        after = pos + 1 if pos < len(ids) and ids[pos] == item_id else pos
+        return ids[after:after + PREFETCH_AHEAD] + ids[max(0, pos - PREFETCH_BEHIND):pos]
+
+    def poll_results(self):
+        """Tk loop: shows finished lookups, caches prefetched images, drops superseded ones."""
+        try:
+            while True:
+                result = self.search_worker.results.get_nowait()
+                job = result['job']
+                if job['id'] != self.search_worker.latest:
+                    continue
+                if job.get('prefetch'):
+                    if result.get('image') is not None:
+                        from PIL import ImageTk
+                        self.render_cache.put(result['key'], ImageTk.PhotoImage(result['image']))
+                elif 'error' in result:
+                    messagebox.showerror("Error", f"Failed to open image: {result['error']}")
+                elif result['path'] is None:
+                    # No modal dialog here: it would swallow the next scans
+                    self.clear_image(f"Could not find image for '{job['item_id']}'.{self.did_you_mean(job['item_id'])}")
+                else:
+                    self.display_image(result, job['started'])
+        except queue.Empty:
+            pass
+        self.root.after(RESULT_POLL_MS, self.poll_results)
+
+    def find_file(self, folder, filename, is_stale=lambda: False):
+        index = self.image_index
+        if index is not None and index.folder == folder and index.ready:
+            return index.lookup(filename)
+
+        # Index still building: fall back to walking the folder
         for root, dirs, files in os.walk(folder):
-            for ext in extensions:
+            if is_stale():
+                return None
+            for ext in IMAGE_EXTENSIONS:
                 target = filename + ext
                 if target in files:
                     return os.path.join(root, target)
         return None
 
-    def display_image(self, path):
+    def display_image(self, result, started):
+        from PIL import ImageTk
+
         try:
-            img = Image.open(path)
-            # Maintain aspect ratio logic
-            display_width, display_height = 750, 550
-            img_ratio = img.width / img.height
-            frame_ratio = display_width / display_height
-
-            if img_ratio > frame_ratio:
-                new_width = display_width
-                new_height = int(display_width / img_ratio)
+            key = result['key']
+            photo = self.render_cache.get(key)
+            if photo is not None:
+                detail = "render cache hit"
+                METRICS.count("render_cache_hits")
             else:
-                new_height = display_height
-                new_width = int(display_height * img_ratio)
-
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
+                METRICS.count("render_cache_misses")
+                img, detail = result['image'], result.get('detail')
+                if img is None:
+                    # Evicted between the worker's check and now
+                    img, detail = self.decode_image(result['path'])
+                photo = ImageTk.PhotoImage(img)
+                self.render_cache.put(key, photo)
 
             self.lbl_image.config(image=photo, text="")
             self.lbl_image.image = photo 
+            self.current_path = result['path']
+            self.btn_similar.config(state="normal")
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            METRICS.observe("lookup", elapsed_ms / 1000)
+            cache = self.render_cache
+            self.lbl_debug.config(text=f"{os.path.basename(result['path'])}: {elapsed_ms:.0f} ms ({detail}) · "
+                                       f"cache {len(cache.entries)} images / {cache.total_bytes / 1048576:.1f} MB")
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open image: {e}")
 
-    def clear_image(self):
-        self.lbl_image.config(image="", text="No image displayed")
+    def decode_image(self, path):
+        """Loads an image at display size, from its stored preview when possible. Returns (PIL image, debug detail)."""
+        from PIL import Image
+
+        store = self.preview_store
+        if store is not None and path.startswith(store.folder):
+            try:
+                preview, generated = store.get(path)
+                img = Image.open(preview)
+                img.load()
+                return img, "preview generated" if generated else "stored preview"
+            except Exception as e:
+                print(f"Preview Error ({path}): {e}")
+
+        # Maintain aspect ratio logic
+        return load_scaled(path, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+
+    def clear_image(self, message="No image displayed"):
+        self.lbl_image.config(image="", text=message)
         self.lbl_image.image = None
+        self.current_path = None
+        self.btn_similar.config(state="disabled")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import time
+
+# Compact once the journal holds this many transactions
+COMPACT_EVERY = 200
+
+
+def fsync_dir(path):
+    """Makes a rename inside path durable (no-op where directories can't be opened, e.g. Windows)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, data):
+    """Writes bytes to path via a fsync'd temp file and rename, so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+class InventoryJournal:
+    """Snapshot + append-only log of quantity changes for one inventory file.
+
+    The snapshot is the regular inventory JSON. Each finalized transaction
+    appends one fsync'd line of deltas to <snapshot>.journal, so a sale
+    writes a few bytes instead of the whole catalog. compact() folds the
+    deltas back into the snapshot.
+
+    The journal's first line records a hash of the snapshot it applies to.
+    If the snapshot has been replaced since (a pull, a manual edit, or a
+    compaction interrupted after the snapshot was swapped in) the old
+    deltas are already accounted for or deliberately discarded, and the
+    journal is started afresh.
+
+    A register that merges with a shared copy also keeps the sync base (the
+    remote inventory its counts were last merged onto) in <snapshot>.base.
+    A new base travels in the same journal line as the merged counts, and
+    compaction writes the base file before swapping in the snapshot, so a
+    crash can never leave the inventory paired with the wrong base.
+
+    Only one process may write a journal at a time: a writer takes lock()
+    on <snapshot>.lock first. It is an OS lock, so it goes away with the
+    process even after a crash.
+    """
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.base_path = snapshot_path + ".base"
+        self.lock_path = snapshot_path + ".lock"
+        self.lock_file = None   # open while this process holds the lock
+        self.pending = 0        # transactions in the journal since the last compaction
+        self.sync_base = None   # newest sync base in the journal, not yet written to base_path
+
+    @staticmethod
+    def normalize(data):
+        return {k.upper(): v for k, v in data.items()}
+
+    def load(self):
+        """Returns the current inventory: snapshot with the journal replayed on top."""
+        with open(self.snapshot_path, 'rb') as f:
+            raw = f.read()
+        inventory = self.normalize(json.loads(raw))
+        base = hashlib.sha1(raw).hexdigest()
+        self.sync_base = None
+
+        records, torn = self._read_journal()
+        if not records or records[0].get('base') != base:
+            self._start_journal(base)
+            return inventory
+        if torn:
+            # Drop the partial line so the next append doesn't get glued onto it
+            write_atomic(self.journal_path, "".join(json.dumps(r) + "\n" for r in records).encode())
+
+        for record in records[1:]:
+            for item_id, delta in record['deltas'].items():
+                inventory[item_id] = inventory.get(item_id, 0) + delta
+            if 'sync_base' in record:
+                self.sync_base = self.normalize(record['sync_base'])
+        self.pending = len(records) - 1
+        return inventory
+
+    def lock(self):
+        """Takes the writer lock without waiting; False if another process holds it."""
+        if self.lock_file is not None:
+            return True
+        f = open(self.lock_path, 'a')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self.lock_file = f
+        return True
+
+    def unlock(self):
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+    def _read_journal(self):
+        """(records, torn): the parsed lines, and whether a partial line was found at the end."""
+        if not os.path.exists(self.journal_path):
+            return [], False
+        records = []
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A torn last line from a crash mid-append; everything before it is intact
+                    return records, True
+        return records, False
+
+    def _start_journal(self, base):
+        header = json.dumps({'base': base, 'created': time.time()}) + "\n"
+        write_atomic(self.journal_path, header.encode())
+        self.pending = 0
+
+    def append(self, deltas, sync_base=None):
+        """Durably records one transaction's quantity changes ({item id: change}).
+
+        With sync_base, the same line also records the new sync base, so the
+        changes and the base are replayed together or not at all.
+        """
+        record = {'ts': time.time(), 'deltas': deltas}
+        if sync_base is not None:
+            record['sync_base'] = sync_base
+        record = json.dumps(record) + "\n"
+        with open(self.journal_path, 'a') as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending += 1
+        if sync_base is not None:
+            self.sync_base = sync_base
+
+    @property
+    def needs_compaction(self):
+        return self.pending >= COMPACT_EVERY
+
+    def compact(self, inventory):
+        """Writes inventory as the new snapshot and empties the journal."""
+        if self.sync_base is not None:
+            # Before the snapshot: once the journal is emptied this file is the only copy
+            write_atomic(self.base_path, json.dumps(self.sync_base).encode())
+        raw = json.dumps(inventory, indent=4).encode()
+        write_atomic(self.snapshot_path, raw)
+        # A crash here leaves a journal whose base no longer matches; load() then discards it
+        self._start_journal(hashlib.sha1(raw).hexdigest())
+        self.sync_base = None
@@ -0,0 +1,39 @@
+def count_deltas(local, base):
+    """{item id: change} that turns base into local.
+
+    IDs missing from local count as unchanged (registers never delete IDs);
+    IDs new in local are included even at quantity 0 so they get created.
+    """
+    return {k: v - base.get(k, 0) for k, v in local.items() if k not in base or v != base[k]}
+
+
+def subtract_deltas(deltas, sent):
+    """Deltas still outstanding after sent has been applied remotely."""
+    remaining = dict(deltas)
+    for item_id, change in sent.items():
+        remaining[item_id] = remaining.get(item_id, 0) - change
+        if remaining[item_id] == 0:
+            del remaining[item_id]
+    return remaining
+
+
+def apply_deltas(inventory, deltas):
+    """Three-way merge on counts: inventory plus this register's deltas.
+
+    Returns (merged, conflicts). Quantities are never clamped: if two
+    registers sold the last unit, the count goes negative and the item is
+    reported in conflicts as (item id, reason) so someone can recount it.
+    """
+    merged = dict(inventory)
+    conflicts = []
+    for item_id, change in deltas.items():
+        if item_id not in merged and change < 0:
+            conflicts.append((item_id, f"removed remotely, but {-change} sold here"))
+        merged[item_id] = merged.get(item_id, 0) + change
+        if merged[item_id] < 0:
+            conflicts.append((item_id, f"negative stock ({merged[item_id]})"))
+    return merged, conflicts
+
+
+def format_conflicts(conflicts):
+    return "\n".join(f"• {item_id}: {reason}" for item_id, reason in conflicts)
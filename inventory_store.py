@@ -0,0 +1,209 @@
+"""SQLite inventory store shared by ItemLookUp, ImageSearchApp and InventoryApp.
+
+One WAL-mode database holds item ID -> quantity, so any number of readers
+can look items up while a register commits a sale. IDs are stored
+normalized (trimmed, upper-case) whichever tool wrote them.
+
+Move existing JSON files in or out with:
+
+    python inventory_store.py import inventory.json --db inventory.db
+    python inventory_store.py export inventory.json --db inventory.db
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from id_index import normalize_id
+from inventory_journal import InventoryJournal
+from transactions import find_problems
+
+DEFAULT_DB = "inventory.db"
+
+# File extensions the tools treat as a store rather than a JSON inventory
+STORE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+# How long a writer waits for another process's transaction before giving up
+BUSY_TIMEOUT = 10
+
+TABLES = {
+    'items': "CREATE TABLE IF NOT EXISTS items (id TEXT PRIMARY KEY, qty INTEGER NOT NULL) WITHOUT ROWID",
+    # The remote inventory InventoryApp last merged onto (see inventory_merge)
+    'sync_base': "CREATE TABLE IF NOT EXISTS sync_base (id TEXT PRIMARY KEY, qty INTEGER NOT NULL) WITHOUT ROWID",
+}
+
+
+def is_store_path(path):
+    return path.lower().endswith(STORE_EXTENSIONS)
+
+
+class StockError(Exception):
+    """A decrement was refused; problems is [(item id, "invalid" | "oversold")]."""
+
+    def __init__(self, problems):
+        super().__init__(", ".join(f"{item_id} ({reason})" for item_id, reason in problems))
+        self.problems = problems
+
+
+class InventoryStore:
+    """Item ID -> quantity table with point lookups and atomic multi-item decrements.
+
+    sqlite3 connections can't be shared between threads, so each thread
+    gets its own; WAL mode lets them (and other processes) read while one
+    of them writes.
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.local = threading.local()
+        # Only take the write lock if there is something to create, so opening a
+        # store never waits on (or holds up) a register committing a sale
+        existing = {name for (name,) in self.connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [ddl for name, ddl in TABLES.items() if name not in existing]
+        if missing:
+            with self.transaction() as db:
+                for ddl in missing:
+                    db.execute(ddl)
+
+    def connection(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            # isolation_level=None: transactions are opened explicitly in transaction()
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=FULL")   # a finalized sale must survive a power cut
+            self.local.db = db
+        return db
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT: takes the write lock up front so check-then-update can't race."""
+        db = self.connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    # --- Reads ---
+    def get(self, item_id):
+        """Quantity for item_id, or None if it isn't stocked."""
+        row = self.connection().execute("SELECT qty FROM items WHERE id = ?", (normalize_id(item_id),)).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, item_ids):
+        return {item_id: qty for item_id, qty in ((i, self.get(i)) for i in item_ids) if qty is not None}
+
+    def all(self):
+        return dict(self.connection().execute("SELECT id, qty FROM items"))
+
+    def ids(self):
+        """Every stocked item ID, without the quantities (read straight from the primary key)."""
+        return frozenset(item_id for (item_id,) in self.connection().execute("SELECT id FROM items"))
+
+    def __len__(self):
+        return self.connection().execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def sync_base(self):
+        """The saved sync base, or None if none has been saved yet."""
+        return dict(self.connection().execute("SELECT id, qty FROM sync_base")) or None
+
+    def data_version(self):
+        """Changes whenever another connection commits; a cheap way to poll for updates.
+
+        Only comparable with earlier values read on the same thread (connection).
+        """
+        return self.connection().execute("PRAGMA data_version").fetchone()[0]
+
+    # --- Writes ---
+    def decrement(self, counts):
+        """Takes {item id: quantity sold} off stock in one transaction, or nothing at all.
+
+        Raises StockError if any item is unknown or has too few left, checked
+        under the write lock, so two registers can't both sell the last unit.
+        """
+        counts = {normalize_id(k): v for k, v in counts.items()}
+        with self.transaction() as db:
+            current = {}
+            for item_id in counts:
+                row = db.execute("SELECT qty FROM items WHERE id = ?", (item_id,)).fetchone()
+                if row is not None:
+                    current[item_id] = row[0]
+            problems = find_problems(current, counts)
+            if problems:
+                raise StockError(problems)
+            db.executemany("UPDATE items SET qty = qty - ? WHERE id = ?", [(qty, item_id) for item_id, qty in counts.items()])
+
+    def apply_deltas(self, deltas, sync_base=None):
+        """Adds {item id: change} to the stored quantities in one transaction; unknown IDs are created.
+
+        Relative updates keep whatever other registers sold in the meantime.
+        With sync_base, the saved sync base is replaced in the same transaction.
+        """
+        with self.transaction() as db:
+            db.executemany("INSERT INTO items (id, qty) VALUES (?, ?) "
+                           "ON CONFLICT (id) DO UPDATE SET qty = qty + excluded.qty",
+                           ((normalize_id(k), v) for k, v in deltas.items()))
+            if sync_base is not None:
+                db.execute("DELETE FROM sync_base")
+                db.executemany("INSERT INTO sync_base (id, qty) VALUES (?, ?)",
+                               ((normalize_id(k), v) for k, v in sync_base.items()))
+
+    def replace_all(self, inventory, sync_base=None):
+        """Makes the table hold exactly inventory (e.g. after a pull).
+
+        With sync_base, the saved sync base is replaced in the same transaction.
+        """
+        with self.transaction() as db:
+            db.execute("DELETE FROM items")
+            db.executemany("INSERT OR REPLACE INTO items (id, qty) VALUES (?, ?)",
+                           ((normalize_id(k), v) for k, v in inventory.items()))
+            if sync_base is not None:
+                db.execute("DELETE FROM sync_base")
+                db.executemany("INSERT INTO sync_base (id, qty) VALUES (?, ?)",
+                               ((normalize_id(k), v) for k, v in sync_base.items()))
+
+    # --- JSON import / export ---
+    def import_json(self, path):
+        """Imports a JSON inventory the way InventoryApp reads it: snapshot plus journal.
+
+        Sales still waiting in <path>.journal are replayed first, and the
+        register's sync base comes along too, so nothing since the last
+        compaction is lost.
+        """
+        journal = InventoryJournal(path)
+        inventory = journal.load()
+        sync_base = journal.sync_base
+        if sync_base is None and os.path.exists(journal.base_path):
+            with open(journal.base_path, 'r') as f:
+                sync_base = journal.normalize(json.load(f))
+        self.replace_all(inventory, sync_base=sync_base)
+        return len(inventory)
+
+    def export_json(self, path):
+        inventory = self.all()
+        with open(path, 'w') as f:
+            json.dump(inventory, f, indent=4)
+        return len(inventory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy inventory between a JSON file and the SQLite store.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("json_file")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database path")
+    args = parser.parse_args()
+
+    store = InventoryStore(args.db)
+    if args.action == "import":
+        print(f"Imported {store.import_json(args.json_file):,} items into {args.db}")
+    else:
+        print(f"Exported {store.export_json(args.json_file):,} items to {args.json_file}")
+
+
+if __name__ == "__main__":
+    main()
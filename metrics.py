@@ -0,0 +1,198 @@
+"""Stage timers, counters and latency histograms shared by the lookup tools.
+
+Collection is off unless ITEMLOOKUP_METRICS=1 is set or a debug overlay
+turns it on; while off, every call returns straight away. Results can be
+written as Prometheus text to ITEMLOOKUP_METRICS_FILE and, when
+ITEMLOOKUP_METRICS_PORT is set, served at http://localhost:<port>/metrics.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+def env_port(name):
+    """Port number from an environment variable, or 0 (off) if unset or not a number."""
+    value = os.environ.get(name, "0")
+    try:
+        return int(value)
+    except ValueError:
+        # A typo in an optional debug setting shouldn't stop the apps from starting
+        print(f"Metrics Error: {name}={value!r} is not a port number")
+        return 0
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_FILE = os.environ.get("ITEMLOOKUP_METRICS_FILE", "metrics.prom")
+METRICS_PORT = env_port("ITEMLOOKUP_METRICS_PORT")
+EXPORT_INTERVAL = 10   # seconds between metrics file writes
+
+PREFIX = "itemlookup"
+
+
+class Histogram:
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)    # last one is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (e.g. q=0.95)."""
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'stage', 'started')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """Process-wide registry. Safe to update from any thread."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.exporting = False
+
+    # --- Recording ---
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, stage):
+        """with METRICS.timer("decode"): ... records the block's duration under that stage."""
+        return _Timer(self, stage) if self.enabled else NULL_TIMER
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # --- Reporting ---
+    def summary_lines(self):
+        """Human-readable lines for the debug overlays."""
+        with self.lock:
+            lines = [f"{stage:<16} n={h.count:<6} avg {h.total / h.count * 1000:7.1f} ms  "
+                     f"p95 ≤{h.quantile(0.95) * 1000:6.0f} ms  max {h.max * 1000:7.1f} ms"
+                     for stage, h in sorted(self.histograms.items())]
+            lines += [f"{name:<24} {value:,}" for name, value in sorted(self.counters.items())]
+        return lines or ["(no measurements yet)"]
+
+    def prometheus_text(self):
+        out = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                out.append(f"# TYPE {PREFIX}_{name}_total counter")
+                out.append(f"{PREFIX}_{name}_total {value}")
+            if self.histograms:
+                out.append(f"# TYPE {PREFIX}_stage_seconds histogram")
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), h.buckets):
+                    cumulative += n
+                    out.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                out.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {h.total:.6f}')
+                out.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(out) + "\n"
+
+    def write(self, path=METRICS_FILE):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    # --- Export ---
+    def start_exporting(self):
+        """Writes METRICS_FILE every EXPORT_INTERVAL while enabled, and serves METRICS_PORT if set. Idempotent."""
+        if self.exporting:
+            return
+        self.exporting = True
+
+        def write_loop():
+            while True:
+                time.sleep(EXPORT_INTERVAL)
+                if self.enabled:
+                    try:
+                        self.write()
+                    except OSError as e:
+                        print(f"Metrics Error: {e}")
+
+        threading.Thread(target=write_loop, daemon=True).start()
+        if METRICS_PORT:
+            # Only imported when the endpoint is wanted; every app imports this module at startup
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            metrics = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = metrics.prometheus_text().encode()
+                    self.send_response(200 if self.path == "/metrics" else 404)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.end_headers()
+                    if self.path == "/metrics":
+                        self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            try:
+                server = ThreadingHTTPServer(("127.0.0.1", METRICS_PORT), Handler)
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+            except OSError as e:
+                # Another tool on this machine already serves the port
+                print(f"Metrics Error: port {METRICS_PORT}: {e}")
+
+
+METRICS = Metrics(enabled=os.environ.get("ITEMLOOKUP_METRICS") == "1")
@@ -0,0 +1,60 @@
+import tkinter as tk
+
+from metrics import METRICS, METRICS_FILE
+
+OVERLAY_REFRESH_MS = 1000
+
+
+class MetricsOverlay:
+    """F12 window with live stage timings and counters for a Tk app.
+
+    Opening it switches collection on; closing it puts collection back to
+    how it was (off unless ITEMLOOKUP_METRICS=1).
+    """
+
+    def __init__(self, root, key="<F12>"):
+        self.root = root
+        self.window = None
+        self.was_enabled = METRICS.enabled
+        root.bind_all(key, self.toggle)
+        METRICS.start_exporting()
+
+    def toggle(self, event=None):
+        if self.window is not None:
+            self.close()
+            return
+        self.was_enabled = METRICS.enabled
+        METRICS.enabled = True
+
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Metrics (F12 to close)")
+        self.window.attributes("-topmost", True)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.label = tk.Label(self.window, font=("Courier", 9), justify="left", anchor="nw")
+        self.label.pack(fill="both", expand=True, padx=8, pady=8)
+
+        buttons = tk.Frame(self.window)
+        buttons.pack(fill="x", padx=8, pady=(0, 8))
+        tk.Button(buttons, text="Reset", command=METRICS.reset).pack(side="left")
+        tk.Button(buttons, text="Export", command=self.export).pack(side="left", padx=5)
+        self.refresh(self.window)
+
+    def close(self):
+        if self.window is not None:
+            self.window.destroy()
+            self.window = None
+        METRICS.enabled = self.was_enabled
+
+    def export(self):
+        try:
+            METRICS.write()
+            self.window.title(f"Metrics · written to {METRICS_FILE}")
+        except OSError as e:
+            self.window.title(f"Metrics · export failed: {e}")
+
+    def refresh(self, window):
+        # A window closed (and maybe reopened) since this was scheduled has its own refresh chain
+        if window is not self.window:
+            return
+        self.label.config(text="\n".join(METRICS.summary_lines()))
+        self.root.after(OVERLAY_REFRESH_MS, self.refresh, window)
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import threading
+
+from image_index import IMAGE_EXTENSIONS
+
+# Folder created inside the image folder to hold the previews
+PREVIEW_DIR_NAME = ".previews"
+
+# Used instead when the image folder is read-only (e.g. a locked-down NAS share)
+FALLBACK_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "ItemLookUp", "previews")
+
+PREVIEW_QUALITY = 85
+
+
+def fit_size(width, height, max_width, max_height):
+    """Largest size with the image's aspect ratio that fits in the box."""
+    img_ratio = width / height
+    frame_ratio = max_width / max_height
+    if img_ratio > frame_ratio:
+        return max_width, max(1, int(max_width / img_ratio))
+    return max(1, int(max_height * img_ratio)), max_height
+
+
+def load_scaled(path, max_width, max_height):
+    """Decodes an image straight to display size. Returns (PIL image, debug detail)."""
+    from PIL import Image   # imported on first use so the apps start without waiting for Pillow
+
+    img = Image.open(path)
+    original_size = img.size
+    new_size = fit_size(img.width, img.height, max_width, max_height)
+
+    # JPEGs can be decoded at 1/2, 1/4 or 1/8 scale directly, which skips most of the decode work
+    img.draft("RGB", new_size)
+    scale = original_size[0] // img.width
+    img.load()
+
+    if img.size != new_size:
+        # reducing_gap box-shrinks most of the way first, so LANCZOS only runs on the last step
+        img = img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+    detail = f"decoded {original_size[0]}x{original_size[1]}" + (f" at 1/{scale}" if scale > 1 else "")
+    return img, detail
+
+
+def is_image_name(name):
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS[1:]
+
+
+def pick_cache_dir(folder):
+    """PREVIEW_DIR_NAME inside folder, or a per-folder directory under FALLBACK_ROOT if folder is read-only."""
+    preview_dir = os.path.join(folder, PREVIEW_DIR_NAME)
+    try:
+        os.makedirs(preview_dir, exist_ok=True)
+        if os.access(preview_dir, os.W_OK):
+            return preview_dir
+    except OSError:
+        pass
+    folder_key = hashlib.sha1(os.path.abspath(folder).encode()).hexdigest()[:16]
+    preview_dir = os.path.join(FALLBACK_ROOT, folder_key)
+    os.makedirs(preview_dir, exist_ok=True)
+    return preview_dir
+
+
+class PreviewStore:
+    """Display-sized JPEG previews of every image in a folder, kept on disk.
+
+    A preview is keyed by the original's path, mtime and size, so editing or
+    replacing a photo simply makes its old preview unreachable; prune()
+    clears those out after a full pass.
+    """
+
+    def __init__(self, folder, width, height):
+        self.folder = folder
+        self.width = width
+        self.height = height
+        self.preview_dir = pick_cache_dir(folder)
+        # Progress of the current pre-generation pass
+        self.total = 0
+        self.done = 0
+        self.generated = 0
+        self.running = False
+        self.cancelled = False
+
+    def preview_path(self, path):
+        """Where the preview for the current version of path lives, or None if path is gone."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        rel = os.path.relpath(path, self.folder)
+        key = f"{rel}|{st.st_mtime_ns}|{st.st_size}|{self.width}x{self.height}"
+        return os.path.join(self.preview_dir, hashlib.sha1(key.encode()).hexdigest() + ".jpg")
+
+    def get(self, path):
+        """Preview file for path, generating it first if needed. Returns (preview path, generated)."""
+        preview = self.preview_path(path)
+        if preview is None:
+            raise FileNotFoundError(path)
+        if os.path.exists(preview):
+            return preview, False
+        self._generate(path, preview)
+        return preview, True
+
+    def _generate(self, path, preview):
+        img, _ = load_scaled(path, self.width, self.height)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        tmp_path = f"{preview}.{threading.get_ident()}.tmp"
+        img.save(tmp_path, "JPEG", quality=PREVIEW_QUALITY)
+        os.replace(tmp_path, preview)
+
+    def pregenerate(self, paths):
+        """Makes sure every image in paths has an up-to-date preview. Meant for a background thread."""
+        paths = [p for p in paths if is_image_name(p)]
+        self.total, self.done, self.generated = len(paths), 0, 0
+        self.running, self.cancelled = True, False
+        wanted = set()
+        try:
+            for path in paths:
+                if self.cancelled:
+                    return
+                preview = self.preview_path(path)
+                if preview is not None:
+                    wanted.add(os.path.basename(preview))
+                    if not os.path.exists(preview):
+                        try:
+                            self._generate(path, preview)
+                            self.generated += 1
+                        except Exception as e:
+                            print(f"Preview Error ({path}): {e}")
+                self.done += 1
+            self.prune(wanted)
+        finally:
+            self.running = False
+
+    def prune(self, wanted):
+        """Deletes previews of originals that were changed or removed."""
+        for entry in os.scandir(self.preview_dir):
+            if entry.name.endswith(".jpg") and entry.name not in wanted:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
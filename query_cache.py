@@ -0,0 +1,109 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import METRICS
+
+DEFAULT_TTL = 15 * 60                   # seconds
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024    # rough cap on the memory held by cached results
+
+
+def clean_query(query_text):
+    """The query as searched: whitespace trimmed and runs of it collapsed to one space."""
+    return " ".join(query_text.split())
+
+
+def normalize_query(query_text):
+    """Drive name matching is case-insensitive, so 'k294 ' and 'K294' share a cache entry.
+
+    Only correct as a cache key if the search itself used clean_query(query_text).
+    """
+    return clean_query(query_text).lower()
+
+
+def estimate_size(items):
+    """Approximate memory held by a list of Drive file dicts."""
+    size = sys.getsizeof(items)
+    for item in items:
+        size += sys.getsizeof(item)
+        for key, value in item.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+class QueryCache:
+    """Process-wide search result cache shared by every session.
+
+    Entries are keyed by (root folder, normalized query), expire after ttl
+    seconds, and are evicted least-recently-used first once the total size
+    goes over max_bytes. A search that stopped at the result cap is stored
+    as partial and only answers requests that want no more than it holds.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    # (root, query) -> (stored_at, items, complete, size)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, root_folder_id, query_text, limit=None):
+        """Cached results, or None on a miss."""
+        key = (root_folder_id, normalize_query(query_text))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is None or not (entry[2] or (limit is not None and len(entry[1]) >= limit)):
+                self.misses += 1
+                METRICS.count("query_cache_misses")
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            METRICS.count("query_cache_hits")
+            items = entry[1]
+            return items if limit is None else items[:limit]
+
+    def put(self, root_folder_id, query_text, items, complete=True):
+        key = (root_folder_id, normalize_query(query_text))
+        items = list(items)
+        size = estimate_size(items)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (time.time(), items, complete, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+
+    def invalidate(self, root_folder_id):
+        """Drops every entry under a root folder, e.g. after its index picked up changes."""
+        with self.lock:
+            for key in [k for k in self.entries if k[0] == root_folder_id]:
+                self._drop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry[3]
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+            }
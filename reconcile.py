@@ -0,0 +1,154 @@
+"""Image folder <-> inventory reconciliation.
+
+Walks the image tree once, listing directories in parallel, and matches
+every inventory ID against the file names with the same rules as
+ImageSearchApp.find_file (each of IMAGE_EXTENSIONS in order, exact case
+first, then case-insensitive). Reports:
+
+    missing     inventory IDs with no photo
+    orphan      photos whose name matches no inventory ID
+    duplicate   IDs matched by more than one file (the first path is the one the app shows)
+
+    python reconcile.py /path/to/images /path/to/Inventory.json --output report.tsv
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from image_index import IMAGE_EXTENSIONS, scan_dir
+from inventory_store import InventoryStore, is_store_path
+
+# Directory listings are I/O-bound (especially on network shares), so more threads than cores pays off
+DEFAULT_WORKERS = 16
+
+IMAGE_SUFFIXES = tuple(IMAGE_EXTENSIONS[1:])
+
+
+def scan_tree(folder, max_workers=DEFAULT_WORKERS):
+    """{file name: [dir paths]} for the whole tree, listing directories concurrently."""
+    locations = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(scan_dir, folder): folder}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dirpath = pending.pop(future)
+                scanned = future.result()
+                if scanned is None:
+                    continue
+                _, names, subdirs = scanned
+                for name in names:
+                    locations.setdefault(name, []).append(dirpath)
+                for subdir in subdirs:
+                    pending[executor.submit(scan_dir, subdir)] = subdir
+    for dirs in locations.values():
+        dirs.sort()
+    return locations
+
+
+def match_keys(name):
+    """Lower-cased item IDs that could resolve to this file under find_file's rules."""
+    keys = [name.lower()]   # the '' extension: the file is named exactly like the ID
+    stem, ext = os.path.splitext(name)
+    if ext.lower() in IMAGE_SUFFIXES:
+        keys.append(stem.lower())
+    return keys
+
+
+def match_rank(item_id, name):
+    """Sort key giving find_file's preference: exact case before any case, then IMAGE_EXTENSIONS order."""
+    for i, ext in enumerate(IMAGE_EXTENSIONS):
+        if name == item_id + ext:
+            return 0, i
+    for i, ext in enumerate(IMAGE_EXTENSIONS):
+        if name.lower() == (item_id + ext).lower():
+            return 1, i
+    return 2, 0
+
+
+def reconcile(locations, item_ids):
+    """Joins a {file name: [dirs]} listing against inventory IDs.
+
+    Returns {'missing': [id], 'orphan': [path], 'duplicate': {id: [paths]}}.
+    """
+    by_key = {}
+    for name in locations:
+        for key in match_keys(name):
+            by_key.setdefault(key, []).append(name)
+
+    missing, duplicate, claimed = [], {}, set()
+    for item_id in sorted(item_ids):
+        names = by_key.get(item_id.lower())
+        if not names:
+            missing.append(item_id)
+            continue
+        claimed.update(names)
+        if len(names) > 1 or len(locations[names[0]]) > 1:
+            names = sorted(names, key=lambda n: match_rank(item_id, n))
+            duplicate[item_id] = [os.path.join(d, n) for n in names for d in locations[n]]
+
+    orphan = sorted(os.path.join(dirpath, name)
+                    for name, dirs in locations.items()
+                    if name not in claimed and name.lower().endswith(IMAGE_SUFFIXES)
+                    for dirpath in dirs)
+    return {'missing': missing, 'orphan': orphan, 'duplicate': duplicate}
+
+
+def report_rows(report):
+    """(kind, item id, path) rows for a TSV report."""
+    for item_id in report['missing']:
+        yield "missing", item_id, ""
+    for path in report['orphan']:
+        yield "orphan", os.path.splitext(os.path.basename(path))[0], path
+    for item_id, paths in report['duplicate'].items():
+        for path in paths:
+            yield "duplicate", item_id, path
+
+
+def write_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("Kind\tItem ID\tPath\n")
+        f.writelines("\t".join(row) + "\n" for row in report_rows(report))
+
+
+def summary(report):
+    return (f"{len(report['missing']):,} missing · {len(report['orphan']):,} orphan · "
+            f"{len(report['duplicate']):,} duplicate")
+
+
+def load_item_ids(path):
+    if is_store_path(path):
+        return list(InventoryStore(path).all())
+    with open(path, 'r') as f:
+        return list(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find inventory IDs without photos and photos without inventory IDs.")
+    parser.add_argument("images_folder")
+    parser.add_argument("inventory", help="inventory JSON file or store (.db)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--output", help="write the full report here as TSV")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    locations = scan_tree(args.images_folder, args.workers)
+    scanned = time.perf_counter()
+    report = reconcile(locations, load_item_ids(args.inventory))
+    finished = time.perf_counter()
+
+    files = sum(len(dirs) for dirs in locations.values())
+    print(f"Scanned {files:,} files in {scanned - started:.2f}s · joined in {finished - scanned:.2f}s")
+    print(summary(report))
+    if args.output:
+        write_report(report, args.output)
+        print(f"Report written to {args.output}")
+    else:
+        for kind, item_id, path in report_rows(report):
+            print(f"{kind:<10} {item_id:<16} {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import importlib
+import threading
+import time
+
+# Import this module first: its clock starts when the script starts loading modules
+STARTED = time.perf_counter()
+
+
+class StartupTimer:
+    """Milestones since startup (imports, first paint, data loaded), reported once all have happened."""
+
+    def __init__(self, expected=("first paint",)):
+        self.marks = {}         # milestone -> ms since STARTED
+        self.notes = {}         # milestone -> what went wrong, for milestones reached by failing
+        self.expected = list(expected)
+        self.root = None
+        self.paint_callbacks = []
+        self.report_callbacks = []
+
+    def mark(self, name, note=None):
+        """Records a milestone; note (e.g. "failed") is shown next to it in the report."""
+        if name in self.marks:
+            return
+        self.marks[name] = (time.perf_counter() - STARTED) * 1000
+        if note:
+            self.notes[name] = note
+        if name == "first paint":
+            for callback in self.paint_callbacks:
+                callback()
+        if all(n in self.marks for n in self.expected) and name in self.expected:
+            print(f"Startup: {self.summary()}")
+            for callback in self.report_callbacks:
+                callback(self.summary())
+
+    def summary(self):
+        return " · ".join(f"{name} {ms:.0f} ms" + (f" ({self.notes[name]})" if name in self.notes else "")
+                          for name, ms in self.marks.items())
+
+    def watch(self, root):
+        """Marks "first paint" once root is mapped and its initial redraw has run."""
+        self.root = root
+        root.bind("<Map>", self._on_map, add="+")
+
+    def _on_map(self, event):
+        if event.widget is self.root and "first paint" not in self.marks:
+            # Redraws are idle callbacks queued on map; ours runs after them
+            self.root.after_idle(self.mark, "first paint")
+
+    def when_painted(self, callback):
+        """Runs callback once the window has been drawn (straight away if it already has)."""
+        if "first paint" in self.marks:
+            callback()
+        else:
+            self.paint_callbacks.append(callback)
+
+
+def warm_imports(*modules):
+    """Imports heavy modules on a background thread so their first real use doesn't stall the UI."""
+    def work():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Import Error ({name}): {e}")
+
+    threading.Thread(target=work, daemon=True).start()
@@ -1,11 +1,27 @@
+from startup_timer import StartupTimer
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import messagebox
-from tksheet import Sheet
-import subprocess
 import os
 import json
+import queue
 import shutil
+import time
+from array import array
+from bisect import bisect_left
 from collections import Counter
+from compact_inventory import CompactInventory
+from inventory_journal import InventoryJournal
+from inventory_merge import count_deltas, subtract_deltas, apply_deltas, format_conflicts
+from inventory_store import DEFAULT_DB, InventoryStore, StockError
+from transactions import count_items
+from metrics import METRICS
+from metrics_overlay import MetricsOverlay
+from tk_tasks import run_in_background
+import git_sync
+
+STARTUP = StartupTimer(expected=("first paint", "inventory loaded"))
+STARTUP.mark("imports")
 
 # --- CONFIGURATION ---
 # UPDATE THIS PATH to your separate Data Repo folder
@@ -17,6 +33,124 @@ FILENAME = "inventory.json"
 # Derived Paths
 LOCAL_FILE = os.path.join(os.getcwd(), FILENAME)
 REMOTE_FILE = os.path.join(DATA_REPO_PATH, FILENAME)
+# Remote inventory as of the last sync: local sales are whatever differs from it
+SYNC_BASE_FILE = LOCAL_FILE + ".base"
+
+# Optional shared SQLite store (see inventory_store.py), found the same way ItemLookUp finds it:
+# the INVENTORY_DB environment variable, else inventory.db here if it exists. None keeps inventory.json + journal
+INVENTORY_DB = os.environ.get("INVENTORY_DB") or (DEFAULT_DB if os.path.exists(DEFAULT_DB) else None)
+
+# Push journaled sales automatically this often (0 = only when Push is clicked)
+AUTO_SYNC_MINUTES = 0
+
+# How often the UI picks up progress from the git worker
+SYNC_POLL_MS = 200
+
+# Cell highlight colours (match the legend)
+COLOR_OK = "#DFF0D8"
+COLOR_OVERSOLD = "orange"
+COLOR_INVALID = "#FFCDD2"
+
+# Items at or below this quantity show up under the "Low stock" filter
+LOW_STOCK_QTY = 3
+
+class VirtualInventoryList:
+    """Scrollable ID | Qty list that only ever renders the rows in view.
+
+    Keeps a sorted list of slots (positions in the CompactInventory's ID
+    order) per filter ("All", "Low stock", "Out of stock") and updates just
+    the IDs a transaction touched, so the panel costs the same with 50 SKUs
+    or 50,000 and never holds its own copy of the ID strings.
+    """
+
+    FILTERS = {
+        "All": lambda qty: True,
+        "Low stock": lambda qty: qty <= LOW_STOCK_QTY,
+        "Out of stock": lambda qty: qty <= 0,
+    }
+
+    def __init__(self, parent, inventory, font=("Courier", 11), bg="#F8F9FA"):
+        self.inventory = inventory
+        self.mode = "All"
+        self.views = {}
+        self.top = 0
+
+        self.scrollbar = tk.Scrollbar(parent, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.text = tk.Text(parent, font=font, state="disabled", bg=bg, wrap="none")
+        self.text.pack(side="left", fill="both", expand=True)
+        self.line_height = max(1, tkfont.Font(font=font).metrics("linespace"))
+
+        self.text.bind("<Configure>", lambda e: self.render())
+        self.text.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.text.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        self.text.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+
+        self.set_inventory(inventory)
+
+    def set_inventory(self, inventory):
+        """Full rebuild, for when the whole inventory was replaced (load / pull)."""
+        self.inventory = inventory
+        qty = inventory.qty
+        self.views = {
+            name: array('i', (slot for slot, q in enumerate(qty) if keep(q))) if name != "All" else range(len(qty))
+            for name, keep in self.FILTERS.items()
+        }
+        self.render()
+
+    def update_items(self, item_ids):
+        """Moves just these IDs in or out of each filtered view after their quantities changed."""
+        for item_id in item_ids:
+            slot = self.inventory.slot(item_id)
+            if slot < 0:
+                continue
+            qty = self.inventory.qty[slot]
+            for name, keep in self.FILTERS.items():
+                view = self.views[name]
+                pos = bisect_left(view, slot)
+                present = pos < len(view) and view[pos] == slot
+                wanted = keep(qty)
+                if wanted and not present:
+                    view.insert(pos, slot)
+                elif present and not wanted:
+                    del view[pos]
+        self.render()
+
+    def set_filter(self, mode):
+        self.mode = mode
+        self.top = 0
+        self.render()
+
+    def visible_rows(self):
+        return max(1, self.text.winfo_height() // self.line_height)
+
+    def yview(self, *args):
+        rows = self.visible_rows()
+        total = len(self.views[self.mode])
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = rows if args[2] == "pages" else 1
+            self.top += int(args[1]) * step
+        self.render()
+
+    def render(self):
+        ids = self.views[self.mode]
+        rows = self.visible_rows()
+        self.top = max(0, min(self.top, len(ids) - rows))
+
+        inventory = self.inventory
+        lines = [f"{inventory.id_at(slot):<8}| {inventory.qty[slot]}" for slot in ids[self.top:self.top + rows]]
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.text.config(state="disabled")
+
+        if ids:
+            self.scrollbar.set(self.top / len(ids), min(1.0, (self.top + rows) / len(ids)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
 
 class InventoryApp:
     def __init__(self, root):
@@ -25,32 +159,57 @@ class InventoryApp:
         self.root.geometry("1450x750") 
         
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        STARTUP.watch(root)
         
-        self.inventory = self.load_inventory()
+        self.journal = InventoryJournal(LOCAL_FILE)
+        self.store = InventoryStore(INVENTORY_DB) if INVENTORY_DB else None
+        if self.store is None and not self.journal.lock():
+            messagebox.showwarning("Inventory In Use", f"{FILENAME} is already open in another program "
+                                   "(another InventoryApp or batch_finalize.py). Sales saved here may overwrite its changes.")
+        # Filled in by start_loading() once the window is up
+        self.inventory = CompactInventory()
+        self.sync_base = {}
+        self.loaded = False
+        self.sheet = None
+        self.id_index = None
+
+        # Running validation state, so a single edit only re-checks the cells it can affect
+        self.item_counts = Counter()   # item id -> times it appears on the grid
+        self.item_cells = {}           # item id -> {(row, col), ...}
+        self.cell_items = {}           # (row, col) -> item id
+        self.cell_status = {}          # (row, col) -> highlight colour currently applied
+
+        # Git runs on a worker thread; the UI only polls its events
+        self.sync_worker = git_sync.GitSyncWorker()
+        self.push_pending = False   # a push is queued or running and finish_push hasn't run yet
+        self.push_again = False     # Push was asked for meanwhile; runs once the pending one is adopted
 
         # --- Top Control Panel (Buttons) ---
         control_frame = tk.Frame(self.root)
         control_frame.pack(fill="x", padx=10, pady=(10, 5))
 
-        self.btn_pull = tk.Button(control_frame, text="⬇ Pull Remote", bg="#FF9800", fg="white", font=("Arial", 10, "bold"), command=self.pull_inventory_data)
+        self.btn_pull = tk.Button(control_frame, text="⬇ Pull Remote", bg="#FF9800", fg="white", font=("Arial", 10, "bold"), state="disabled", command=self.pull_inventory_data)
         self.btn_pull.pack(side="left", padx=(0, 5))
 
-        self.btn_finalize = tk.Button(control_frame, text="✔ Finalize Transaction", bg="#4CAF50", fg="white", font=("Arial", 10, "bold"), command=self.finalize_transaction)
+        self.btn_finalize = tk.Button(control_frame, text="✔ Finalize Transaction", bg="#4CAF50", fg="white", font=("Arial", 10, "bold"), state="disabled", command=self.finalize_transaction)
         self.btn_finalize.pack(side="left", padx=(5, 5))
 
-        self.btn_push = tk.Button(control_frame, text="⬆ Push to Git", bg="#2196F3", fg="white", font=("Arial", 10, "bold"), command=self.push_inventory_data)
+        self.btn_push = tk.Button(control_frame, text="⬆ Push to Git", bg="#2196F3", fg="white", font=("Arial", 10, "bold"), state="disabled", command=self.push_inventory_data)
         self.btn_push.pack(side="left", padx=(5, 5))
 
-        self.btn_add_rows = tk.Button(control_frame, text="+ Add 10 Rows", bg="#9E9E9E", fg="white", font=("Arial", 10, "bold"), command=self.add_more_rows)
+        self.btn_add_rows = tk.Button(control_frame, text="+ Add 10 Rows", bg="#9E9E9E", fg="white", font=("Arial", 10, "bold"), state="disabled", command=self.add_more_rows)
         self.btn_add_rows.pack(side="left", padx=(5, 5))
 
-        self.btn_copy = tk.Button(control_frame, text="📋 Copy Grid", bg="#673AB7", fg="white", font=("Arial", 10, "bold"), command=self.copy_grid_to_clipboard)
+        self.btn_copy = tk.Button(control_frame, text="📋 Copy Grid", bg="#673AB7", fg="white", font=("Arial", 10, "bold"), state="disabled", command=self.copy_grid_to_clipboard)
         self.btn_copy.pack(side="left", padx=(5, 0))
         
         tk.Label(control_frame, text="Legend: ", font=("Arial", 10, "bold")).pack(side="left", padx=(40, 0))
-        tk.Label(control_frame, text=" OK ", bg="#DFF0D8").pack(side="left", padx=2)
-        tk.Label(control_frame, text=" Oversold ", bg="orange").pack(side="left", padx=2)
-        tk.Label(control_frame, text=" Invalid ID ", bg="#FFCDD2").pack(side="left", padx=2)
+        tk.Label(control_frame, text=" OK ", bg=COLOR_OK).pack(side="left", padx=2)
+        tk.Label(control_frame, text=" Oversold ", bg=COLOR_OVERSOLD).pack(side="left", padx=2)
+        tk.Label(control_frame, text=" Invalid ID ", bg=COLOR_INVALID).pack(side="left", padx=2)
+
+        self.sync_label = tk.Label(control_frame, text="Loading inventory...", fg="gray40", font=("Arial", 9))
+        self.sync_label.pack(side="right")
 
         # --- Time Input Panel ---
         time_frame = tk.Frame(self.root)
@@ -87,18 +246,10 @@ class InventoryApp:
         self.sheet_frame = tk.Frame(main_content_frame)
         self.sheet_frame.pack(side="left", fill="both", expand=True)
 
-        headers = ["Buyer"] + ["Item ID"] * 10
-        self.sheet = Sheet(self.sheet_frame, headers=headers, total_columns=11, total_rows=15)
-        self.sheet.enable_bindings(("single_select", "row_select", "column_width_resize", 
-                                    "arrowkeys", "rc_select", "copy", "cut", "paste", 
-                                    "delete", "undo", "edit_cell"))
-        self.sheet.pack(fill="both", expand=True)
-
-        col_widths = [200] + [85] * 10
-        self.sheet.set_column_widths(col_widths)
-
-        self.sheet.extra_bindings("end_edit_cell", func=self.validate_entire_sheet)
-        self.sheet.extra_bindings("end_paste", func=self.validate_entire_sheet)
+        # The grid (and tksheet itself) is built right after the first paint; see build_sheet()
+        self.sheet_placeholder = tk.Label(self.sheet_frame, text="Loading grid...", fg="gray50")
+        self.sheet_placeholder.pack(expand=True)
+        STARTUP.when_painted(self.build_sheet)
 
         # RIGHT SIDE: Inventory Display Panel
         self.inv_display_frame = tk.Frame(main_content_frame, width=280) # Increased width to 280 to fit longer labels
@@ -121,18 +272,89 @@ class InventoryApp:
 
         self.search_result_label = tk.Label(search_frame, text="Qty: -", font=("Arial", 10, "bold"))
         self.search_result_label.pack(side="left", padx=(5, 0))
+        self.search_entry.bind("<KeyRelease>", self.update_suggestions)
+
+        # Live ID suggestions while typing
+        self.suggestion_label = tk.Label(self.inv_display_frame, text="", fg="gray40", anchor="w", justify="left", wraplength=270)
+        self.suggestion_label.pack(fill="x", pady=(0, 5))
         # ---------------------------
 
-        # Scrollbar and Text area
-        self.inv_scrollbar = tk.Scrollbar(self.inv_display_frame)
-        self.inv_scrollbar.pack(side="right", fill="y")
+        # Stock filter
+        filter_frame = tk.Frame(self.inv_display_frame)
+        filter_frame.pack(fill="x", pady=(0, 5))
+        tk.Label(filter_frame, text="Show:").pack(side="left")
+        self.filter_var = tk.StringVar(value="All")
+        tk.OptionMenu(filter_frame, self.filter_var, *VirtualInventoryList.FILTERS,
+                      command=lambda mode: self.inv_list.set_filter(mode)).pack(side="left")
+
+        # Column header, then the virtualized list (only visible rows are drawn)
+        tk.Label(self.inv_display_frame, text="ID      | Qty\n" + "-" * 15, font=("Courier", 11),
+                 bg="#F8F9FA", anchor="w", justify="left").pack(fill="x")
+        self.inv_list = VirtualInventoryList(self.inv_display_frame, self.inventory)
+
+        # F12: live stage timings and counters
+        self.metrics_overlay = MetricsOverlay(root)
+
+        self.start_loading()
+        self.root.after(SYNC_POLL_MS, self.poll_sync_events)
+        if AUTO_SYNC_MINUTES > 0:
+            self.root.after(AUTO_SYNC_MINUTES * 60000, self.auto_sync)
+
+    # --- Startup ---
+    def build_sheet(self):
+        from tksheet import Sheet
+
+        self.sheet_placeholder.destroy()
+        headers = ["Buyer"] + ["Item ID"] * 10
+        self.sheet = Sheet(self.sheet_frame, headers=headers, total_columns=11, total_rows=15)
+        self.sheet.enable_bindings(("single_select", "row_select", "column_width_resize", 
+                                    "arrowkeys", "rc_select", "copy", "cut", "paste", 
+                                    "delete", "undo", "edit_cell"))
+        self.sheet.pack(fill="both", expand=True)
 
-        self.inv_text = tk.Text(self.inv_display_frame, yscrollcommand=self.inv_scrollbar.set, font=("Courier", 11), state="disabled", bg="#F8F9FA")
-        self.inv_text.pack(side="left", fill="both", expand=True)
-        self.inv_scrollbar.config(command=self.inv_text.yview)
+        col_widths = [200] + [85] * 10
+        self.sheet.set_column_widths(col_widths)
 
-        # Populate the display initially
+        self.sheet.extra_bindings("end_edit_cell", func=self.validate_edited_cell)
+        self.sheet.extra_bindings("end_paste", func=self.validate_entire_sheet)
+        # Deletes, cuts and undos can clear or restore many cells at once; tksheet 6 and 7
+        # name these events differently, and each version ignores the other's names
+        for names in (("end_delete", "end_delete_key"), ("end_cut", "end_ctrl_x"), ("end_undo", "end_ctrl_z")):
+            for name in names:
+                self.sheet.extra_bindings(name, func=self.validate_entire_sheet)
+        self.check_ready()
+
+    def start_loading(self):
+        """Reads the inventory (snapshot + journal, or the store) on a background thread."""
+        def work():
+            inventory = self.load_inventory()
+            return CompactInventory(inventory), self.load_sync_base(inventory)
+
+        run_in_background(self.root, work, self.finish_loading, poll_ms=20)
+
+    def finish_loading(self, data, error):
+        if error is not None:
+            # Stay unloaded: the buttons stay disabled and nothing is written back over inventory.json
+            print(f"Load Error: {error}")
+            STARTUP.mark("inventory loaded", note="failed")
+            self.sync_label.config(text=f"Inventory failed to load: {error}", fg="red")
+            messagebox.showerror("Load Error", f"Could not load the inventory, so sales and syncing are disabled:\n{error}")
+            return
+        self.inventory, self.sync_base = data
+        self.loaded = True
+        STARTUP.mark("inventory loaded")
+        self.sync_label.config(text="Sync: idle")
+        self.rebuild_id_index()
         self.update_inventory_display()
+        self.check_ready()
+
+    def check_ready(self):
+        """Once both the grid and the inventory are there: validate and unlock the buttons."""
+        if self.sheet is None or not self.loaded:
+            return
+        self.validate_entire_sheet()
+        for button in (self.btn_pull, self.btn_finalize, self.btn_push, self.btn_add_rows, self.btn_copy):
+            button.config(state="normal")
 
     def search_inventory(self, event=None):
         """Looks up the item ID, displays the formatted result, and clears the bar."""
@@ -149,26 +371,38 @@ class InventoryApp:
             else:
                 self.search_result_label.config(text=f"{query} - Qty: 0", fg="red")
         else:
-            self.search_result_label.config(text=f"{query} - Not Found", fg="red")
+            close = self.id_index.similar(query, 3) if self.id_index else []
+            hint = f" (did you mean {' / '.join(close)}?)" if close else ""
+            self.search_result_label.config(text=f"{query} - Not Found{hint}", fg="red")
             
         # Clear the search bar text
         self.search_var.set("")
+        self.update_suggestions()
 
-    def update_inventory_display(self):
-        self.inv_text.config(state="normal") 
-        self.inv_text.delete("1.0", tk.END)  
-        
-        display_str = "ID      | Qty\n"
-        display_str += "-" * 15 + "\n"
-        
-        for item_id, qty in sorted(self.inventory.items()):
-            display_str += f"{item_id:<8}| {qty}\n"
-            
-        self.inv_text.insert(tk.END, display_str)
-        self.inv_text.config(state="disabled")
+    def rebuild_id_index(self):
+        """Points the ID suggestions at the current inventory; nothing is copied, so it is instant."""
+        self.id_index = self.inventory.id_index()
+
+    def update_suggestions(self, event=None):
+        query = self.search_var.get().strip()
+        matches = self.id_index.suggest(query, 6) if self.id_index and query else []
+        self.suggestion_label.config(text=", ".join(matches))
+
+    def update_inventory_display(self, changed_ids=None):
+        """Refreshes the side panel: just changed_ids if given, otherwise everything."""
+        if changed_ids is None:
+            self.inv_list.set_inventory(self.inventory)
+        else:
+            self.inv_list.update_items(changed_ids)
 
     def on_closing(self):
-        if messagebox.askyesno("Exit Confirmation", "Are you sure you want to exit?\nUnsaved work on the grid will be lost."):
+        message = "Are you sure you want to exit?\nUnsaved work on the grid will be lost."
+        if self.sync_worker.busy:
+            message += f"\n\nA git {self.sync_worker.busy} is still running and will be cut off."
+        if messagebox.askyesno("Exit Confirmation", message):
+            # Fold the journal into inventory.json so the file is complete on its own
+            if self.loaded and self.journal.pending:
+                self.save_inventory_locally()
             self.root.destroy()
 
     def add_more_rows(self):
@@ -203,67 +437,116 @@ class InventoryApp:
             messagebox.showerror("Error", f"Failed to copy: {e}")
 
     def load_inventory(self):
-        if not os.path.exists(LOCAL_FILE):
-            if os.path.exists(REMOTE_FILE):
-                shutil.copy(REMOTE_FILE, LOCAL_FILE)
-            else:
+        """The inventory to start from; raises if it exists but can't be read (see finish_loading)."""
+        if not os.path.exists(LOCAL_FILE) and os.path.exists(REMOTE_FILE):
+            shutil.copy(REMOTE_FILE, LOCAL_FILE)
+        with METRICS.timer("json_load"):
+            if self.store is not None:
+                if not len(self.store) and os.path.exists(LOCAL_FILE):
+                    # First run with the store: bring over inventory.json and any journaled sales
+                    self.store.replace_all(self.journal.load())
+                return self.store.all()
+            if not os.path.exists(LOCAL_FILE):
                 return {}
+            # Snapshot plus any transactions journaled since it was written
+            return self.journal.load()
+
+    def load_sync_base(self, inventory):
+        if self.store is not None:
+            base = self.store.sync_base()
+            if base is not None:
+                return base
+        elif self.journal.sync_base is not None:
+            # A merge journaled just before a crash, whose compaction never finished
+            return self.journal.sync_base
+        if os.path.exists(SYNC_BASE_FILE):
+            path = SYNC_BASE_FILE
+        elif os.path.exists(REMOTE_FILE):
+            # First run with merging: the data repo copy is what the last pull/push left behind
+            path = REMOTE_FILE
+        else:
+            return dict(inventory)
         try:
-            with open(LOCAL_FILE, 'r') as f:
-                data = json.load(f)
-                return {k.upper(): v for k, v in data.items()}
+            with open(path, 'r') as f:
+                return InventoryJournal.normalize(json.load(f))
         except Exception as e:
-            print(f"Load Error: {e}")
-            return {}
+            print(f"Sync Base Error: {e}")
+            return dict(inventory)
 
     def save_inventory_locally(self):
+        """Writes the full inventory to inventory.json, emptying the journal (compaction).
+
+        With a store every sale is committed as it happens, so there is nothing to write.
+        """
+        if self.store is not None or not self.loaded:
+            # Compacting an inventory that never loaded would overwrite inventory.json with it
+            return
         try:
-            with open(LOCAL_FILE, 'w') as f:
-                json.dump(self.inventory, f, indent=4)
+            with METRICS.timer("save"):
+                self.journal.compact(self.inventory.to_dict())
         except Exception as e:
             messagebox.showerror("Save Error", f"Could not save file: {e}")
 
+    def record_transaction(self, transaction_counts):
+        """Persists one sale. Returns False if the store refused it and nothing was sold."""
+        if self.store is not None:
+            try:
+                # Re-checked under the store's write lock, in case another register sold the same items
+                with METRICS.timer("save"):
+                    self.store.decrement(transaction_counts)
+                return True
+            except StockError as e:
+                messagebox.showerror("Error", f"Stock changed on another register: {e}")
+            except Exception as e:
+                messagebox.showerror("Save Error", f"Could not save transaction: {e}")
+            self.inventory = CompactInventory(self.store.all())
+            self.rebuild_id_index()
+            self.update_inventory_display()
+            self.validate_entire_sheet()
+            return False
+
+        # The journal write costs depend on the items sold, not the catalog size
+        try:
+            with METRICS.timer("save"):
+                self.journal.append({item_id: -qty for item_id, qty in transaction_counts.items()})
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Could not save transaction: {e}")
+        return True
+
     def finalize_transaction(self):
-        all_data = self.sheet.get_sheet_data()
-        transaction_counts = Counter()
-        
-        for row_data in all_data:
-            for item in row_data[1:]: 
-                item_str = str(item).strip().upper()
-                if item_str:
-                    transaction_counts[item_str] += 1
+        with METRICS.timer("validation"):
+            transaction_counts = count_items(self.sheet.get_sheet_data())
+            problems = self.inventory.check(transaction_counts)
         
         if not transaction_counts:
             messagebox.showinfo("Info", "No items to finalize.")
             return
 
-        for item_id, qty_needed in transaction_counts.items():
-            if item_id not in self.inventory:
-                messagebox.showerror("Error", f"Item '{item_id}' is invalid.")
-                return
-            if qty_needed > self.inventory[item_id]:
-                messagebox.showerror("Error", f"Item '{item_id}' is oversold.")
-                return
+        # Same checks as batch_finalize.py; the first problem is reported
+        if problems:
+            item_id, reason = problems[0]
+            messagebox.showerror("Error", f"Item '{item_id}' is {reason}.")
+            return
 
         confirm = messagebox.askyesno("Confirm", "Finalize transaction and update inventory?")
         if not confirm:
             return
 
-        items_hit_zero = []
-        for item_id, qty_used in transaction_counts.items():
-            self.inventory[item_id] -= qty_used
-            if self.inventory[item_id] == 0:
-                items_hit_zero.append(item_id)
-        
-        self.save_inventory_locally()
+        if not self.record_transaction(transaction_counts):
+            return
+
+        items_hit_zero = self.inventory.decrement(transaction_counts)
+
+        if self.journal.needs_compaction:
+            self.save_inventory_locally()
         
-        self.update_inventory_display()
+        self.update_inventory_display(transaction_counts)
         
         self.search_var.set("")
         self.search_inventory() 
         
         self.sheet.set_sheet_data([["" for _ in range(11)] for _ in range(15)])
-        self.sheet.redraw()
+        self.validate_entire_sheet()
 
         success_msg = "Transaction Finalized Successfully!"
         if items_hit_zero:
@@ -277,82 +560,219 @@ class InventoryApp:
         if not os.path.exists(DATA_REPO_PATH):
             messagebox.showerror("Error", f"Data Repo path not found:\n{DATA_REPO_PATH}")
             return
-        
-        if not messagebox.askyesno("Force Update", "Overwrite local inventory with Git version?\nUnsaved changes will be lost."):
+
+        job = lambda progress: git_sync.pull_inventory(DATA_REPO_PATH, FILENAME, progress=progress)
+        if self.sync_worker.request("pull", job):
+            self.btn_pull.config(state="disabled")
+
+    def push_inventory_data(self, notify=True):
+        if not self.loaded:
+            return
+        if not os.path.exists(DATA_REPO_PATH):
+            if notify:
+                messagebox.showerror("Error", f"Data Repo path not found:\n{DATA_REPO_PATH}")
             return
 
-        try:
-            subprocess.run(["git", "fetch", "--all"], cwd=DATA_REPO_PATH, capture_output=True, text=True)
-            reset_result = subprocess.run(["git", "reset", "--hard", "origin/main"], cwd=DATA_REPO_PATH, capture_output=True, text=True)
-            
-            if reset_result.returncode != 0:
-                messagebox.showerror("Git Error", f"Reset failed:\n{reset_result.stderr}")
-                return
-
-            if os.path.exists(REMOTE_FILE):
-                shutil.copy(REMOTE_FILE, LOCAL_FILE)
-                self.inventory = self.load_inventory()
-                
-                self.update_inventory_display()
-                self.validate_entire_sheet()
-                
-                self.search_var.set("")
-                self.search_inventory()
-                
-                messagebox.showinfo("Success", f"Inventory Force Updated!\nServer status: {reset_result.stdout}")
-            else:
-                messagebox.showerror("Error", "inventory.json missing from data repo.")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        if self.push_pending:
+            # Deltas worked out now would still count the pending push's sales, since the
+            # sync base only moves in finish_push; send whatever is left once it has
+            self.push_again = True
+            self.sync_label.config(text="Sync: push in progress, another will follow")
+            return
+
+        sent = count_deltas(self.inventory, self.sync_base)
+        if not sent:
+            if notify:
+                messagebox.showinfo("Git Push", "No local changes to push.")
+            return
 
-    def push_inventory_data(self):
+        def job(progress):
+            merged, conflicts = git_sync.push_deltas(DATA_REPO_PATH, FILENAME, sent, progress=progress)
+            return sent, merged, conflicts
+
+        self.push_pending = self.sync_worker.request("push", job, notify)
+
+    def auto_sync(self):
+        """Scheduled push of sales made since the last sync; failures only show in the status line."""
+        self.push_inventory_data(notify=False)
+        self.root.after(AUTO_SYNC_MINUTES * 60000, self.auto_sync)
+
+    def adopt_remote(self, remote, deltas):
+        """Rebases local sales (deltas) onto a newer remote inventory. Returns conflicts."""
+        merged, conflicts = apply_deltas(remote, deltas)
         try:
-            shutil.copy(LOCAL_FILE, REMOTE_FILE)
+            with METRICS.timer("save"):
+                self.save_sync_state(remote, merged)
         except Exception as e:
-            messagebox.showerror("Copy Error", f"Failed to copy inventory to repo: {e}")
+            messagebox.showerror("Save Error", f"Could not save sync state: {e}")
+            return conflicts
+        self.sync_base = remote
+        self.inventory = CompactInventory(merged if self.store is None else self.store.all())
+        self.rebuild_id_index()
+
+        self.update_inventory_display()
+        self.validate_entire_sheet()
+
+        self.search_var.set("")
+        self.search_inventory()
+        return conflicts
+
+    def save_sync_state(self, remote, merged):
+        """Saves a new sync base and the inventory merged onto it as one unit.
+
+        Saved apart, a crash in between would pair the merged counts with the
+        old base, and the next push would send other registers' sales back.
+        """
+        changes = count_deltas(merged, self.inventory.to_dict())
+        if self.store is not None:
+            # Only the remote's changes, as increments, so sales other registers committed
+            # to the store since self.inventory was read are kept
+            self.store.apply_deltas(changes, sync_base=remote)
             return
+        # One journal line carries both; compacting it then writes the base file before the snapshot
+        self.journal.append(changes, sync_base=remote)
+        self.journal.compact(merged)
+
+    def finish_pull(self, remote):
+        conflicts = self.adopt_remote(remote, count_deltas(self.inventory, self.sync_base))
+        self.report_sync("Inventory merged with remote.", conflicts)
+
+    def finish_push(self, result, notify):
+        sent, merged, conflicts = result
+        # Whatever was sold while the push was in flight stays local until the next push
+        remaining = subtract_deltas(count_deltas(self.inventory, self.sync_base), sent)
+        conflicts += self.adopt_remote(merged, remaining)
+        if notify or conflicts:
+            self.report_sync(f"Pushed changes to {len(sent)} item(s).", conflicts)
+        self.push_finished()
+
+    def push_finished(self):
+        self.push_pending = False
+        if self.push_again:
+            self.push_again = False
+            self.push_inventory_data(notify=False)
+
+    def report_sync(self, message, conflicts):
+        if conflicts:
+            messagebox.showwarning("Stock Conflicts", f"{message}\n\n⚠️ Check these counts:\n{format_conflicts(conflicts)}")
+        else:
+            messagebox.showinfo("Success", message)
 
-        script_path = "git_sync.bat"
+    def poll_sync_events(self):
         try:
-            result = subprocess.run(["cmd.exe", "/c", script_path, DATA_REPO_PATH], capture_output=True, text=True)
-            if result.returncode == 0:
-                messagebox.showinfo("Git Push Success", result.stdout)
+            while True:
+                self.handle_sync_event(*self.sync_worker.events.get_nowait())
+        except queue.Empty:
+            pass
+        self.root.after(SYNC_POLL_MS, self.poll_sync_events)
+
+    def handle_sync_event(self, kind, state, payload, notify):
+        if state == "queued":
+            self.sync_label.config(text=f"Sync: {kind} queued")
+        elif state == "progress":
+            self.sync_label.config(text=f"Sync ({kind}): {payload}")
+        elif state == "done":
+            self.sync_label.config(text=f"Sync: {kind} done at {time.strftime('%H:%M')}")
+            if kind == "pull":
+                self.btn_pull.config(state="normal")
+                self.finish_pull(payload)
             else:
-                messagebox.showerror("Git Push Error", result.stderr)
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+                self.finish_push(payload, notify)
+        else:
+            self.sync_label.config(text=f"Sync: {kind} failed at {time.strftime('%H:%M')}")
+            print(f"Git {kind} Error: {payload}")
+            if kind == "pull":
+                self.btn_pull.config(state="normal")
+            if notify:
+                messagebox.showerror("Git Error", str(payload))
+            if kind == "push":
+                self.push_finished()
+
+    def cell_color(self, item_id):
+        if not item_id:
+            return None
+        qty = self.inventory.get(item_id)
+        if qty is None:
+            return COLOR_INVALID
+        if self.item_counts[item_id] > qty:
+            return COLOR_OVERSOLD
+        return COLOR_OK
+
+    def apply_cell_color(self, row_idx, col_idx, force=False):
+        """Highlights one cell, skipping the call if its colour hasn't changed."""
+        color = self.cell_color(self.cell_items.get((row_idx, col_idx), ""))
+        if force or self.cell_status.get((row_idx, col_idx)) != color:
+            self.sheet.highlight_cells(row=row_idx, column=col_idx, bg=color, redraw=False)
+            self.cell_status[(row_idx, col_idx)] = color
+
+    def set_cell_item(self, row_idx, col_idx, item_id):
+        """Moves one cell from its old item to item_id in the running counts."""
+        old_id = self.cell_items.pop((row_idx, col_idx), "")
+        if old_id:
+            self.item_counts[old_id] -= 1
+            if not self.item_counts[old_id]:
+                del self.item_counts[old_id]
+            self.item_cells[old_id].discard((row_idx, col_idx))
+            if not self.item_cells[old_id]:
+                del self.item_cells[old_id]
+        if item_id:
+            self.cell_items[(row_idx, col_idx)] = item_id
+            self.item_counts[item_id] += 1
+            self.item_cells.setdefault(item_id, set()).add((row_idx, col_idx))
+        return old_id
+
+    def validate_edited_cell(self, event=None):
+        """Re-checks only the cells whose status a single edit can change."""
+        row_idx = getattr(event, "row", None)
+        col_idx = getattr(event, "column", None)
+        if (row_idx is None or col_idx is None) and isinstance(event, (tuple, list)) and len(event) >= 2:
+            row_idx, col_idx = event[0], event[1]
+        if not isinstance(row_idx, int) or not isinstance(col_idx, int):
+            self.validate_entire_sheet()
+            return
+        if not 1 <= col_idx <= 10:
+            return  # Buyer column
+
+        with METRICS.timer("validate_cell"):
+            try:
+                raw_val = self.sheet.get_cell_data(row_idx, col_idx)
+                item_id = "" if raw_val is None else str(raw_val).strip().upper()
+                old_id = self.set_cell_item(row_idx, col_idx, item_id)
+
+                # The edited cell, plus every other cell holding an item whose count changed
+                self.apply_cell_color(row_idx, col_idx)
+                for changed_id in {old_id, item_id} - {""}:
+                    for cell in self.item_cells.get(changed_id, ()):
+                        self.apply_cell_color(*cell)
+                self.sheet.redraw()
+            except Exception:
+                self.validate_entire_sheet()
 
     def validate_entire_sheet(self, event=None):
-        try:
-            all_data = self.sheet.get_sheet_data()
-            item_counts = Counter()
+        """Rebuilds all validation state from the grid. Used for pulls, pastes, deletes, undos and resets."""
+        with METRICS.timer("validate_sheet"):
+            try:
+                all_data = self.sheet.get_sheet_data()
+                self.item_counts = Counter()
+                self.item_cells = {}
+                self.cell_items = {}
+                self.cell_status = {}
             
-            for row_data in all_data:
-                for item in row_data[1:]: 
-                    item_str = str(item).strip().upper()
-                    if item_str:
-                        item_counts[item_str] += 1
+                for row_idx, row_data in enumerate(all_data):
+                    for col_idx in range(1, 11): 
+                        raw_val = row_data[col_idx]
+                        if raw_val is None: item_id = ""
+                        else: item_id = str(raw_val).strip().upper()
+                        if item_id:
+                            self.set_cell_item(row_idx, col_idx, item_id)
             
-            for row_idx, row_data in enumerate(all_data):
-                for col_idx in range(1, 11): 
-                    raw_val = row_data[col_idx]
-                    if raw_val is None: item_id = ""
-                    else: item_id = str(raw_val).strip().upper()
-
-                    if not item_id:
-                        self.sheet.highlight_cells(row=row_idx, column=col_idx, bg=None, redraw=False)
-                        continue
-
-                    if item_id not in self.inventory:
-                        self.sheet.highlight_cells(row=row_idx, column=col_idx, bg="#FFCDD2", redraw=False)
-                    elif item_counts[item_id] > self.inventory[item_id]:
-                        self.sheet.highlight_cells(row=row_idx, column=col_idx, bg="orange", redraw=False)
-                    else:
-                        self.sheet.highlight_cells(row=row_idx, column=col_idx, bg="#DFF0D8", redraw=False)
+                for row_idx in range(len(all_data)):
+                    for col_idx in range(1, 11): 
+                        self.apply_cell_color(row_idx, col_idx, force=True)
             
-            self.sheet.redraw()
-        except Exception:
-            pass
+                self.sheet.redraw()
+            except Exception:
+                pass
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,48 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from inventory_journal import InventoryJournal
+
+SCRIPT = Path(__file__).resolve().parent.parent / "batch_finalize.py"
+
+
+def run(*args, cwd):
+    return subprocess.run([sys.executable, str(SCRIPT), *args], cwd=cwd, capture_output=True, text=True)
+
+
+def write_sales(tmp_path):
+    sales = tmp_path / "sales.tsv"
+    sales.write_text("Buyer\tItem 1\tItem 2\nann\tk1\tk2\nbob\tk1\t\n")
+    return sales
+
+
+def test_json_mode_applies_through_the_journal(tmp_path):
+    inventory = tmp_path / "inventory.json"
+    inventory.write_text(json.dumps({"K1": 5, "K2": 3}))
+    result = run(str(write_sales(tmp_path)), "--inventory", str(inventory), cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert InventoryJournal(str(inventory)).load() == {"K1": 3, "K2": 2}
+
+
+def test_json_mode_refused_while_the_inventory_is_open(tmp_path):
+    inventory = tmp_path / "inventory.json"
+    inventory.write_text(json.dumps({"K1": 5, "K2": 3}))
+    app = InventoryJournal(str(inventory))
+    assert app.lock()
+    try:
+        result = run(str(write_sales(tmp_path)), "--inventory", str(inventory), cwd=tmp_path)
+        assert result.returncode != 0
+        assert "InventoryApp" in result.stderr and "Traceback" not in result.stderr
+        # A dry run only reads, so it is still allowed
+        assert run(str(write_sales(tmp_path)), "--inventory", str(inventory), "--dry-run", cwd=tmp_path).returncode == 0
+    finally:
+        app.unlock()
+    assert InventoryJournal(str(inventory)).load() == {"K1": 5, "K2": 3}
+
+
+def test_missing_inventory_is_a_clean_error(tmp_path):
+    result = run(str(write_sales(tmp_path)), "--inventory", str(tmp_path / "nope.json"), cwd=tmp_path)
+    assert result.returncode != 0
+    assert "nope.json not found" in result.stderr and "Traceback" not in result.stderr
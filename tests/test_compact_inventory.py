@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from compact_inventory import CompactInventory
+from inventory_store import StockError
+from transactions import find_problems
+
+
+def test_whole_float_and_large_quantities_load():
+    inventory = CompactInventory({"k1": 5.0, "K2": 2 ** 40, "K3": -2})
+    assert inventory.to_dict() == {"K1": 5, "K2": 2 ** 40, "K3": -2}
+    assert type(inventory["K1"]) is int
+
+
+@pytest.mark.parametrize("qty", [5.5, "5", None, float("nan"), float("inf"), 2 ** 63])
+def test_non_whole_quantity_names_the_item(qty):
+    with pytest.raises(ValueError, match="K7"):
+        CompactInventory({"K1": 1, "K7": qty})
+    inventory = CompactInventory({"K1": 1})
+    with pytest.raises(ValueError, match="K7"):
+        inventory["K7"] = qty
+
+
+def test_behaves_like_a_dict():
+    rng = random.Random(0)
+    data = {f"K{rng.randint(0, 500):03d}": rng.randint(0, 5) for _ in range(200)}
+    inventory = CompactInventory(data)
+    assert list(inventory) == sorted(data)
+    assert dict(inventory.items()) == data
+    assert len(inventory.items()) == len(data) and ("K999", 1) not in inventory.items()
+    # items() is a view, so it can be iterated more than once
+    assert list(inventory.items()) == list(inventory.items())
+    inventory["K9999"] = 3
+    del inventory[next(iter(data))]
+    assert "K9999" in inventory and len(inventory) == len(data)
+
+
+def test_check_and_decrement_follow_find_problems():
+    rng = random.Random(1)
+    data = {f"K{i}": rng.randint(0, 4) for i in range(50)}
+    inventory = CompactInventory(data)
+    for _ in range(500):
+        counts = {rng.choice(list(data) + ["NOPE"]): rng.randint(1, 3) for _ in range(4)}
+        problems = find_problems(data, counts)
+        assert inventory.check(counts) == problems
+        if problems:
+            with pytest.raises(StockError):
+                inventory.decrement(counts)
+        else:
+            zero = inventory.decrement(counts)
+            for item_id, qty in counts.items():
+                data[item_id] -= qty
+            assert zero == [item_id for item_id in counts if data[item_id] == 0]
+        assert inventory.to_dict() == data
@@ -0,0 +1,29 @@
+import random
+
+from id_matcher import IdMatcher, parse_id_list
+
+
+def brute_force(ids, name):
+    return {item_id for item_id in ids if item_id.lower() in name.lower()}
+
+
+def test_matches_brute_force_substring_search():
+    # A small alphabet makes overlapping IDs, IDs that are prefixes of each other and repeats common
+    rng = random.Random(3)
+    for _ in range(3000):
+        ids = list({"".join(rng.choice("abAB1") for _ in range(rng.randint(1, 4)))
+                    for _ in range(rng.randint(1, 8))})
+        matcher = IdMatcher(ids)
+        for _ in range(10):
+            name = "".join(rng.choice("abAB1.") for _ in range(rng.randint(0, 12)))
+            assert matcher.matches(name) == brute_force(ids, name), (ids, name)
+
+
+def test_group_lists_exact_names_first():
+    groups = IdMatcher(["K29", "K294"]).group([{'name': "K294.jpg"}, {'name': "k29.jpg"}, {'name': "X1.jpg"}])
+    assert [item['name'] for item in groups["K29"]] == ["k29.jpg", "K294.jpg"]
+    assert [item['name'] for item in groups["K294"]] == ["K294.jpg"]
+
+
+def test_parse_id_list_drops_blanks_and_repeats():
+    assert parse_id_list("K1, k1;K2\n\n K3\tK2") == ["K1", "K2", "K3"]
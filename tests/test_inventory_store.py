@@ -0,0 +1,31 @@
+import json
+
+from inventory_journal import InventoryJournal
+from inventory_store import InventoryStore
+
+
+def test_import_json_replays_the_journal(tmp_path):
+    path = str(tmp_path / "inventory.json")
+    with open(path, 'w') as f:
+        json.dump({"K1": 5, "K2": 3}, f)
+    journal = InventoryJournal(path)
+    journal.load()
+    journal.append({"K1": -2, "K2": -1}, sync_base={"K1": 4, "K2": 3})
+
+    store = InventoryStore(str(tmp_path / "inventory.db"))
+    assert store.import_json(path) == 2
+    assert store.all() == {"K1": 3, "K2": 2}
+    assert store.sync_base() == {"K1": 4, "K2": 3}
+
+
+def test_import_json_reads_the_saved_sync_base(tmp_path):
+    path = str(tmp_path / "inventory.json")
+    with open(path, 'w') as f:
+        json.dump({"k1": 5}, f)
+    with open(path + ".base", 'w') as f:
+        json.dump({"k1": 6}, f)
+
+    store = InventoryStore(str(tmp_path / "inventory.db"))
+    store.import_json(path)
+    assert store.all() == {"K1": 5}
+    assert store.sync_base() == {"K1": 6}
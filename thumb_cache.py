@@ -0,0 +1,146 @@
+import hashlib
+import io
+import os
+import re
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from metrics import METRICS
+
+# Where resized thumbnails are kept between runs
+THUMB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".thumb_cache")
+
+THUMB_SIZE = 320                        # longest side in pixels, roughly one grid column
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024   # disk budget before the least recently used files go
+FETCH_WORKERS = 8
+
+
+def default_fetch(url):
+    with urllib.request.urlopen(url, timeout=15) as response:
+        return response.read()
+
+
+def http_status(error):
+    """HTTP status of a failed download (urllib or requests), or None."""
+    status = getattr(error, 'code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def sized_thumbnail_url(url, size):
+    """Drive thumbnail links end in '=s220'; ask Drive for the size we need instead."""
+    return re.sub(r'=s\d+$', f'=s{size}', url)
+
+
+class ThumbnailCache:
+    """Disk-backed cache of grid-sized thumbnails.
+
+    Each thumbnail is downloaded once, shrunk to THUMB_SIZE and stored as a
+    small JPEG, so repeat views are served from local disk. Files are
+    evicted least recently used first once the folder exceeds max_bytes.
+
+    Drive's thumbnail links expire after a few hours. With link (file id ->
+    fresh thumbnailLink or None), items without one, or whose link is
+    refused, get theirs looked up again on a cache miss.
+    """
+
+    def __init__(self, cache_dir=THUMB_DIR, max_bytes=DEFAULT_MAX_BYTES, size=THUMB_SIZE, fetch=default_fetch,
+                 link=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.size = size
+        self.fetch = fetch
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(cache_dir) if entry.name.endswith(".jpg")
+        )
+
+    def path_for(self, file_id):
+        name = hashlib.sha1(f"{file_id}:{self.size}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.jpg")
+
+    def get(self, item):
+        """Local path of the thumbnail for a Drive item, or None if it has none / can't be fetched."""
+        path = self.path_for(item['id'])
+        if os.path.exists(path):
+            try:
+                os.utime(path)  # mark as recently used
+            except OSError:
+                pass
+            with self.lock:
+                self.hits += 1
+            METRICS.count("thumb_cache_hits")
+            return path
+
+        try:
+            with METRICS.timer("thumbnail_fetch"):
+                data = self.download(item)
+            if data is None:
+                return None
+            img = Image.open(io.BytesIO(data))
+            img.thumbnail((self.size, self.size))
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            img.save(tmp_path, "JPEG", quality=80, optimize=True)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Thumbnail Error ({item.get('name')}): {e}")
+            return None
+
+        METRICS.count("thumb_cache_misses")
+        with self.lock:
+            self.misses += 1
+            self.total_bytes += os.path.getsize(path)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+        return path
+
+    def download(self, item):
+        """Thumbnail bytes for item, or None if it has no thumbnail."""
+        url = item.get('thumbnailLink')
+        if url:
+            try:
+                return self.fetch(sized_thumbnail_url(url, self.size))
+            except Exception as e:
+                # An expired link is refused; anything else is a real failure
+                if self.link is None or http_status(e) not in (403, 404):
+                    raise
+        url = self.link(item['id']) if self.link is not None else None
+        if not url:
+            return None
+        return self.fetch(sized_thumbnail_url(url, self.size))
+
+    def get_many(self, items):
+        """Fetches a page of thumbnails in parallel. Returns paths in the same order."""
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            return list(executor.map(self.get, items))
+
+    def _evict(self):
+        """Drops the least recently used files until the cache is back to 90% of its budget."""
+        entries = sorted(
+            (e for e in os.scandir(self.cache_dir) if e.name.endswith(".jpg")),
+            key=lambda e: e.stat().st_mtime
+        )
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if self.total_bytes <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self.total_bytes -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'bytes': self.total_bytes}
@@ -0,0 +1,32 @@
+import threading
+
+
+def run_in_background(root, fn, on_done, poll_ms=100, while_running=None):
+    """Runs fn() on a daemon thread and calls on_done(result, error) on the Tk thread once it returns.
+
+    Tk must only be touched from the main thread, so the worker never calls
+    back itself; root.after polls it instead. error is the exception fn
+    raised (result is then None), or None. while_running(), if given, is
+    called at every poll until then, e.g. to show progress. Returns the
+    thread, so callers can check is_alive().
+    """
+    outcome = {}
+
+    def work():
+        try:
+            outcome['result'] = fn()
+        except Exception as e:
+            outcome['error'] = e
+
+    def poll():
+        if worker.is_alive():
+            if while_running is not None:
+                while_running()
+            root.after(poll_ms, poll)
+        else:
+            on_done(outcome.get('result'), outcome.get('error'))
+
+    worker = threading.Thread(target=work, daemon=True)
+    worker.start()
+    root.after(poll_ms, poll)
+    return worker
@@ -0,0 +1,27 @@
+from collections import Counter
+
+from id_index import normalize_id
+
+
+def row_items(row):
+    """Item IDs on one grid row (Buyer column skipped, blanks ignored), normalized."""
+    return [item_id for item_id in (normalize_id(cell) for cell in row[1:] if cell is not None) if item_id]
+
+
+def count_items(rows):
+    """{item id: quantity} for a whole transaction, as InventoryApp finalizes it."""
+    counts = Counter()
+    for row in rows:
+        counts.update(row_items(row))
+    return counts
+
+
+def find_problems(inventory, counts):
+    """[(item id, "invalid" | "oversold")] for items the inventory can't cover, in counts order."""
+    problems = []
+    for item_id, qty_needed in counts.items():
+        if item_id not in inventory:
+            problems.append((item_id, "invalid"))
+        elif qty_needed > inventory[item_id]:
+            problems.append((item_id, "oversold"))
+    return problems